@@ -1,12 +1,75 @@
-from flask import Flask, render_template, request, jsonify
+import json
+import os
+from time import perf_counter
+
+from flask import Flask, Response, g, render_template, request, jsonify
 from flask_cors import CORS
 # Import file-file logika Python Anda
-from turing_machine import TuringMachine
-from password_rules import password_rules_dict 
+from turing_machine import DEFAULT_MAX_STEPS, TuringMachine
+from tm_trace import TRACE_DELTA, TRACE_FULL, TRACE_LEVELS
+from rule_registry import DEFAULT_RULE_SET, registry as rule_registry
+from batch_runner import DEFAULT_TIME_BUDGET, BatchRunner
+from result_cache import UNCACHEABLE_RESULTS, ResultCache, compact_result, delta_stream_log, restore_result
+from tm_metrics import MetricsRegistry
 
 app = Flask(__name__)
 CORS(app) 
 
+# Batas atas 'max_steps' yang boleh diminta client (passphrase panjang butuh > 1000 langkah)
+MAX_STEPS_LIMIT = 100000
+
+# Batas untuk /run/batch
+MAX_BATCH_ITEMS = 100000
+MAX_TIME_BUDGET = 10.0 # detik per item
+
+# Process pool untuk /run/batch (dibuat saat batch pertama masuk)
+batch_runner = BatchRunner()
+
+# Cache hasil /run & /run/stream (lihat result_cache.py). TM_RESULT_CACHE_ENTRIES=0
+# mematikan cache. Trace 'full' tidak di-cache (lihat _cache_key); trace 'delta'
+# hanya di-cache jika TM_RESULT_CACHE_TRACE aktif.
+RESULT_CACHE_ENTRIES = int(os.environ.get('TM_RESULT_CACHE_ENTRIES', 4096))
+RESULT_CACHE_BYTES = int(os.environ.get('TM_RESULT_CACHE_BYTES', 16 * 1024 * 1024))
+RESULT_CACHE_TTL = float(os.environ.get('TM_RESULT_CACHE_TTL', 300)) # detik
+RESULT_CACHE_TRACE = os.environ.get('TM_RESULT_CACHE_TRACE', '1') != '0' # simpan trace delta
+result_cache = (ResultCache(RESULT_CACHE_ENTRIES, RESULT_CACHE_BYTES or None, RESULT_CACHE_TTL)
+                if RESULT_CACHE_ENTRIES > 0 else None)
+
+# Metrik untuk /metrics (format Prometheus). Latensi request & jumlah verdict selalu
+# dicatat; penghitung per state/transisi hanya jika TM_METRICS_INSTRUMENT=1.
+METRICS_INSTRUMENT = os.environ.get('TM_METRICS_INSTRUMENT', '0') == '1'
+metrics = MetricsRegistry()
+
+def _cache_key(rule_set, password, trace_level, trace_limit, max_steps):
+    """
+    Kunci cache hasil run. Return None jika level ini tidak di-cache: 'full'
+    (membangun ulang log sama mahalnya dengan run baru), atau 'delta' tanpa
+    TM_RESULT_CACHE_TRACE. Entri 'delta' dipakai bersama /run dan /run/stream.
+    """
+    if result_cache is None or trace_level == TRACE_FULL:
+        return None
+    if trace_level == TRACE_DELTA:
+        if not RESULT_CACHE_TRACE:
+            return None
+        trace_limit = None # Tidak memengaruhi hasil level 'delta'
+    return result_cache.key(rule_registry.identity(rule_set), password, trace_level=trace_level,
+                            trace_limit=trace_limit, max_steps=max_steps)
+
+@app.before_request
+def _start_timer():
+    g.request_start = perf_counter()
+
+@app.after_request
+def _record_request(response):
+    """Latensi per endpoint, dicatat saat response ditutup (termasuk isi streaming)."""
+    start = g.get('request_start')
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        method, status = request.method, response.status_code
+        response.call_on_close(
+            lambda: metrics.observe_request(endpoint, method, status, perf_counter() - start))
+    return response
+
 @app.route('/')
 def index():
     """Menampilkan halaman utama."""
@@ -23,19 +86,63 @@ def run_simulation():
         if password is None:
             return jsonify({"error": "Data 'input_string' tidak ditemukan."}), 400
 
+        # Opsional: level trace ('none' | 'summary' | 'full') dan batas jumlah entri log
+        trace_level = request.form.get('trace_level', TRACE_FULL)
+        if trace_level not in TRACE_LEVELS:
+            return jsonify({"error": f"'trace_level' harus salah satu dari {list(TRACE_LEVELS)}."}), 400
+
+        trace_limit = request.form.get('trace_limit', type=int)
+        if trace_limit is not None and trace_limit <= 0:
+            return jsonify({"error": "'trace_limit' harus bilangan bulat positif."}), 400
+
+        max_steps = request.form.get('max_steps', DEFAULT_MAX_STEPS, type=int)
+        if not 0 < max_steps <= MAX_STEPS_LIMIT:
+            return jsonify({"error": f"'max_steps' harus antara 1 dan {MAX_STEPS_LIMIT}."}), 400
+
+        # Opsional: nama rule set (file rule_sets/<nama>.json, lihat rule_registry.py)
+        rule_set = request.form.get('rule_set', DEFAULT_RULE_SET)
+        if rule_set not in rule_registry:
+            return jsonify({"error": f"'rule_set' harus salah satu dari {rule_registry.names()}."}), 400
+
+        compiled = rule_registry.get(rule_set)
+
+        # Cek cache dulu: input + rule set + parameter yang sama -> hasil yang sama
+        cache_key = _cache_key(rule_set, password, trace_level, trace_limit, max_steps)
+        if cache_key is not None:
+            entry = result_cache.get(cache_key)
+            if entry is not None:
+                result_data = restore_result(entry, password, compiled, trace_level,
+                                             compiled.blank_symbol)
+                if result_data is not None:
+                    metrics.observe_result(rule_set, result_data['result'])
+                    response = jsonify(result_data)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
         # 2. Buat instance Mesin Turing BARU untuk setiap request.
-        # Kita teruskan 'password' ke constructor dan 'rules' dari file Anda.
-        tm = TuringMachine(input_string=password, rules=password_rules_dict)
+        # Kita teruskan 'password' ke constructor dan rules yang sudah dikompilasi.
+        tm = TuringMachine(input_string=password, rules=compiled,
+                           trace_level=trace_level, trace_limit=trace_limit,
+                           max_steps=max_steps, instrument=METRICS_INSTRUMENT)
         
         # 3. Jalankan simulasi.
         # Metode run() di turing_machine.py Anda sudah mengembalikan dict hasil.
         result_data = tm.run()
+        metrics.observe_result(rule_set, result_data['result'])
+        if tm.stats is not None:
+            metrics.observe_run(rule_set, tm.stats)
+        if cache_key is not None and result_data['result'] not in UNCACHEABLE_RESULTS:
+            result_cache.put(cache_key, compact_result(tm, result_data, RESULT_CACHE_TRACE))
 
         # 4. Kembalikan hasil sebagai JSON ke frontend.
-        return jsonify(result_data)
+        response = jsonify(result_data)
+        if cache_key is not None:
+            response.headers['X-Cache'] = 'MISS'
+        return response
 
     except Exception as e:
         print(f"Terjadi Error di Server: {e}")
+        metrics.observe_error('/run')
         return jsonify({
             'result': 'ERROR',
             'log': [f"System Error: {str(e)}"],
@@ -43,5 +150,162 @@ def run_simulation():
             'head_position': 0
         }), 500
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Metrik dalam format teks Prometheus."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/run/cache', methods=['GET'])
+def cache_stats():
+    """Statistik cache hasil /run (hits, misses, evictions, ukuran)."""
+    if result_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **result_cache.stats()})
+
+def _sse(event, data):
+    """Format satu pesan Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/run/stream', methods=['POST'])
+def run_stream():
+    """
+    Menjalankan simulasi dan mengirim log setiap langkah sebagai Server-Sent
+    Events ('step'), segera setelah langkah itu dieksekusi, diakhiri satu
+    event 'result'. Server tidak menyimpan trace, jadi memori per request konstan.
+    Dengan trace_level='delta': satu event 'init' (kamus state/simbol + pita awal)
+    lalu event 'delta' berisi [state, head, simbol_tulis, gerak] per langkah.
+    Entri cache (bersama /run) diputar ulang sebagai event yang sama; stream
+    'delta' yang tidak kena cache mengisi cache.
+    """
+    password = request.form.get('input_string')
+    if password is None:
+        return jsonify({"error": "Data 'input_string' tidak ditemukan."}), 400
+
+    max_steps = request.form.get('max_steps', DEFAULT_MAX_STEPS, type=int)
+    if not 0 < max_steps <= MAX_STEPS_LIMIT:
+        return jsonify({"error": f"'max_steps' harus antara 1 dan {MAX_STEPS_LIMIT}."}), 400
+
+    trace_level = request.form.get('trace_level', TRACE_FULL)
+    if trace_level not in (TRACE_FULL, TRACE_DELTA):
+        return jsonify({"error": f"'trace_level' untuk stream harus '{TRACE_FULL}' atau '{TRACE_DELTA}'."}), 400
+
+    rule_set = request.form.get('rule_set', DEFAULT_RULE_SET)
+    if rule_set not in rule_registry:
+        return jsonify({"error": f"'rule_set' harus salah satu dari {rule_registry.names()}."}), 400
+
+    compiled = rule_registry.get(rule_set)
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+    cache_key = _cache_key(rule_set, password, trace_level, None, max_steps)
+    if cache_key is not None:
+        entry = result_cache.get(cache_key)
+        result_data = None
+        if entry is not None:
+            result_data = restore_result(entry, password, compiled, trace_level, compiled.blank_symbol)
+        if result_data is not None:
+            headers['X-Cache'] = 'HIT'
+            return Response(_replay_stream(rule_set, entry, result_data), mimetype='text/event-stream',
+                            headers=headers)
+        headers['X-Cache'] = 'MISS'
+
+    tm = TuringMachine(input_string=password, rules=compiled, max_steps=max_steps,
+                       trace_level=trace_level)
+    # Trace delta dikumpulkan hanya untuk mengisi cache, dan dilepas begitu perkiraan
+    # ukurannya melewati TM_RESULT_CACHE_BYTES (entri sebesar itu tidak akan disimpan),
+    # jadi memori stream panjang tetap konstan.
+    collected = [] if cache_key is not None and trace_level == TRACE_DELTA else None
+
+    def generate():
+        nonlocal collected
+        collected_bytes = 0
+        try:
+            for kind, payload in tm.run_iter():
+                if kind == 'step':
+                    yield _sse('step', {'log': payload})
+                    continue
+                message = _sse(kind, payload)
+                if kind == 'delta' and collected is not None:
+                    collected_bytes += len(message)
+                    if RESULT_CACHE_BYTES and collected_bytes > RESULT_CACHE_BYTES:
+                        collected = None
+                    else:
+                        collected.append(payload)
+                elif kind == 'result':
+                    metrics.observe_result(rule_set, payload['result'])
+                    if collected is not None and payload['result'] not in UNCACHEABLE_RESULTS:
+                        run_data = {**payload, 'trace': {'steps': collected}}
+                        result_cache.put(cache_key, compact_result(tm, run_data))
+                yield message
+        except Exception as e:
+            print(f"Terjadi Error di Server: {e}")
+            metrics.observe_error('/run/stream')
+            yield _sse('error', {'error': f"System Error: {str(e)}"})
+
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
+def _replay_stream(rule_set, entry, result_data):
+    """Event SSE yang sama seperti run_iter(), dari hasil yang dibangun ulang dari cache."""
+    metrics.observe_result(rule_set, result_data['result'])
+    trace = result_data.pop('trace', None)
+    if trace is not None:
+        result_data['log'] = delta_stream_log(entry, result_data)
+        steps = trace.pop('steps')
+        yield _sse('init', trace)
+        for step in steps:
+            yield _sse('delta', step)
+    else:
+        log = result_data.pop('log')
+        for line in log:
+            yield _sse('step', {'log': line})
+    yield _sse('result', result_data)
+
+def _parse_batch_body():
+    """Ambil daftar password dari body: JSON array atau NDJSON (satu string JSON per baris)."""
+    body = request.get_data(as_text=True)
+    if request.mimetype == 'application/json':
+        items = json.loads(body)
+        if not isinstance(items, list):
+            raise ValueError("Body JSON harus berupa array string.")
+    else:
+        items = [json.loads(line) for line in body.splitlines() if line.strip()]
+
+    if not all(isinstance(item, str) for item in items):
+        raise ValueError("Setiap item harus berupa string.")
+    return items
+
+@app.route('/run/batch', methods=['POST'])
+def run_batch():
+    """
+    Validasi banyak password sekaligus di process pool.
+    Output: NDJSON (satu verdict per baris), urutannya sama dengan input.
+    """
+    try:
+        passwords = _parse_batch_body()
+    except ValueError as e:
+        return jsonify({"error": f"Body batch tidak valid: {e}"}), 400
+
+    if len(passwords) > MAX_BATCH_ITEMS:
+        return jsonify({"error": f"Maksimal {MAX_BATCH_ITEMS} item per batch."}), 413
+
+    max_steps = request.args.get('max_steps', DEFAULT_MAX_STEPS, type=int)
+    if not 0 < max_steps <= MAX_STEPS_LIMIT:
+        return jsonify({"error": f"'max_steps' harus antara 1 dan {MAX_STEPS_LIMIT}."}), 400
+
+    time_budget = request.args.get('time_budget', DEFAULT_TIME_BUDGET, type=float)
+    if not 0 < time_budget <= MAX_TIME_BUDGET:
+        return jsonify({"error": f"'time_budget' harus antara 0 dan {MAX_TIME_BUDGET} detik."}), 400
+
+    rule_set = request.args.get('rule_set', DEFAULT_RULE_SET)
+    if rule_set not in rule_registry:
+        return jsonify({"error": f"'rule_set' harus salah satu dari {rule_registry.names()}."}), 400
+
+    def generate():
+        for verdict in batch_runner.run(passwords, max_steps=max_steps, time_budget=time_budget,
+                                        rule_set=rule_set):
+            metrics.observe_result(rule_set, verdict['result'])
+            yield json.dumps(verdict) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
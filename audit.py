@@ -0,0 +1,265 @@
+# audit.py
+# Audit offline file password besar (satu password per baris). File dibaca lewat
+# memory map dan dibagi menjadi potongan byte yang selalu berakhir di batas baris;
+# setiap potongan divalidasi di process pool, jadi file tidak pernah dimuat utuh
+# ke memori. Password tidak pernah ditulis ke output.
+#
+#   python audit.py passwords.txt -o verdicts.ndjson --stats stats.json
+#   python audit.py passwords.txt --engine dfa --no-verdicts
+#
+# Verdict per baris (NDJSON): {"line": 1, "result": "rejected", "reason": "q_find_upper", "length": 9}
+# "reason" = state tempat mesin berhenti (TuringMachine.halted_from), None jika timeout.
+# Untuk mesin turunan (misal single_pass, yang state-nya komposit seperti
+# q_sweep[3,l---]), reason diambil dari DFA mesin basisnya, yaitu fase q_find_*
+# tempat mesin basis berhenti; verdict-nya identik.
+
+import argparse
+import json
+import mmap
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_runner import DEFAULT_TIME_BUDGET, INFLIGHT_PER_WORKER
+from rule_registry import DEFAULT_RULE_SET, RuleSetError, registry
+from tm_metrics import RESULT_LABELS
+from tm_trace import TRACE_NONE
+from turing_machine import DEFAULT_MAX_STEPS, TuringMachine
+
+ENGINES = ('tm', 'dfa')
+
+# Ukuran potongan byte per tugas worker (dibulatkan ke akhir baris berikutnya)
+DEFAULT_CHUNK_BYTES = 1 << 20
+
+# Panjang di atas batas ini digabung dalam satu bucket distribusi panjang
+MAX_LENGTH_BUCKET = 128
+
+# State per proses worker, diisi oleh _init_worker
+_worker = {}
+
+
+def phase_dfa(rule_set):
+    """
+    SweepDFA untuk `rule_set`, atau untuk mesin basisnya jika rule set ini
+    turunan yang bukan sweep machine. Return (dfa, dari_basis).
+    Raise ValueError jika tidak ada yang bisa diturunkan menjadi DFA.
+    """
+    from tm_dfa import compile_dfa
+
+    name = rule_set
+    while True:
+        try:
+            return compile_dfa(registry.get(name)), name != rule_set
+        except ValueError:
+            base = registry.base_name(name)
+            if base is None:
+                raise
+            name = base
+
+
+def iter_ranges(path, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Yield (start, end) byte range berisi baris utuh, membaca file lewat mmap."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < size:
+                newline = data.find(b'\n', min(start + chunk_bytes, size) - 1)
+                end = size if newline < 0 else newline + 1
+                yield start, end
+                start = end
+
+
+def _init_worker(path, engine, rule_set, max_steps, time_budget):
+    """Initializer worker: buka mmap file dan siapkan engine sekali per proses."""
+    f = open(path, 'rb')
+    _worker['file'] = f
+    _worker['data'] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _worker['engine'] = engine
+    _worker['rules'] = registry.get(rule_set)
+    _worker['max_steps'] = max_steps
+    _worker['time_budget'] = time_budget
+    _worker['dfa'], from_base = None, False
+    if engine == 'dfa' or registry.base_name(rule_set) is not None:
+        _worker['dfa'], from_base = phase_dfa(rule_set)
+    # Mesin turunan: alasan penolakan dipetakan ke fase mesin basis lewat DFA-nya
+    _worker['map_reasons'] = from_base
+
+
+def _lines(start, end):
+    """Baris (str) di byte range [start, end) milik file worker."""
+    lines = _worker['data'][start:end].split(b'\n')
+    if lines[-1] == b'':
+        lines.pop() # Baris terakhir diakhiri newline
+    return [line[:-1].decode('utf-8', 'replace') if line.endswith(b'\r')
+            else line.decode('utf-8', 'replace') for line in lines]
+
+
+def _audit_tm(passwords):
+    rules = _worker['rules']
+    dfa = _worker['dfa'] if _worker['map_reasons'] else None
+    verdicts = []
+    for password in passwords:
+        tm = TuringMachine(password, rules, trace_level=TRACE_NONE,
+                           max_steps=_worker['max_steps'], time_budget=_worker['time_budget'])
+        result = RESULT_LABELS.get(tm.run()["result"], "error")
+        reason = tm.halted_from
+        if dfa is not None and result in ("accepted", "rejected"):
+            reason = dfa.classify(password)[1]
+        verdicts.append((result, reason))
+    return verdicts
+
+
+def _audit_dfa(passwords):
+    dfa = _worker['dfa']
+    # Memori tetap kecil walau ada baris sangat panjang: final_states_bulk membatasi
+    # ukuran matriks dan mengevaluasi baris panjang satu per satu.
+    try:
+        states = dfa.final_states_bulk(passwords).tolist()
+    except (RuntimeError, ValueError):
+        states = [dfa.final_state(password) for password in passwords] # Tanpa numpy / alfabet non-ASCII
+    return [("accepted" if state == dfa.accept_id else "rejected", dfa.halted_from[state])
+            for state in states]
+
+
+def audit_range(start, end):
+    """Validasi semua baris di satu byte range. Return list (result, reason, length)."""
+    passwords = _lines(start, end)
+    audit = _audit_dfa if _worker['engine'] == 'dfa' else _audit_tm
+    return [(result, reason, len(password))
+            for (result, reason), password in zip(audit(passwords), passwords)]
+
+
+class AuditStats:
+    """Agregasi verdict: total per hasil, alasan penolakan per state, distribusi panjang."""
+
+    def __init__(self):
+        self.lines = 0
+        self.results = Counter()
+        self.reject_reasons = Counter()
+        self.lengths = {} # bucket panjang -> Counter hasil
+
+    def add(self, result, reason, length):
+        self.lines += 1
+        self.results[result] += 1
+        if result == "rejected":
+            self.reject_reasons[reason] += 1
+        bucket = length if length < MAX_LENGTH_BUCKET else f"{MAX_LENGTH_BUCKET}+"
+        self.lengths.setdefault(bucket, Counter())[result] += 1
+
+    def to_dict(self):
+        numeric = sorted(key for key in self.lengths if isinstance(key, int))
+        buckets = numeric + [key for key in self.lengths if not isinstance(key, int)]
+        return {
+            "lines": self.lines,
+            "accepted": self.results["accepted"],
+            "rejected": self.results["rejected"],
+            "timeouts": self.results["timeout"],
+            "errors": self.results["error"],
+            "reject_reasons": dict(self.reject_reasons.most_common()),
+            "length_distribution": {
+                str(bucket): {"total": sum(self.lengths[bucket].values()), **self.lengths[bucket]}
+                for bucket in buckets
+            },
+        }
+
+
+def run_audit(path, verdict_file=None, engine='tm', rule_set=DEFAULT_RULE_SET, max_steps=DEFAULT_MAX_STEPS,
+              time_budget=DEFAULT_TIME_BUDGET, workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Audit seluruh file `path`. Verdict per baris ditulis ke `verdict_file`
+    (jika tidak None) sesuai urutan baris. Return AuditStats.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = AuditStats()
+    ranges = iter_ranges(path, chunk_bytes)
+    pending = deque()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(path, engine, rule_set, max_steps, time_budget),
+    ) as executor:
+        def take():
+            for result, reason, length in pending.popleft().result():
+                stats.add(result, reason, length)
+                if verdict_file is not None:
+                    verdict_file.write(json.dumps({"line": stats.lines, "result": result,
+                                                   "reason": reason, "length": length}) + "\n")
+
+        # Jendela tugas in-flight terbatas: memori tetap kecil dan urutan baris terjaga
+        for start, end in ranges:
+            if len(pending) >= workers * INFLIGHT_PER_WORKER:
+                take()
+            pending.append(executor.submit(audit_range, start, end))
+        while pending:
+            take()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit file password (satu per baris) dengan Turing Machine.")
+    parser.add_argument('input', help="file password, dipisahkan newline")
+    parser.add_argument('-o', '--output', default='-', help="file NDJSON verdict per baris ('-' = stdout)")
+    parser.add_argument('--no-verdicts', action='store_true', help="hanya tulis statistik")
+    parser.add_argument('--stats', default=None, help="file JSON statistik (default: stderr)")
+    parser.add_argument('--engine', choices=ENGINES, default='tm',
+                        help="tm = TuringMachine (dengan max_steps/time_budget); "
+                             "dfa = DFA ekuivalen dari tm_dfa (tanpa batas langkah, tidak ada timeout)")
+    parser.add_argument('--rule-set', default=DEFAULT_RULE_SET, help="nama rule set (rule_sets/<nama>.json)")
+    parser.add_argument('--max-steps', type=int, default=DEFAULT_MAX_STEPS)
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help="batas waktu per password (detik, 0 = tanpa batas)")
+    parser.add_argument('--workers', type=int, default=None, help="jumlah proses (default: jumlah core)")
+    parser.add_argument('--chunk-bytes', type=int, default=DEFAULT_CHUNK_BYTES)
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.input):
+        parser.error(f"file tidak ditemukan: {args.input}")
+    if args.max_steps < 1 or args.chunk_bytes < 1 or (args.workers is not None and args.workers < 1):
+        parser.error("--max-steps, --chunk-bytes, dan --workers harus >= 1")
+    # Validasi rule set / engine di proses utama agar error tidak muncul di worker
+    try:
+        registry.get(args.rule_set)
+        if args.engine == 'dfa' or registry.base_name(args.rule_set) is not None:
+            phase_dfa(args.rule_set)
+    except (RuleSetError, ValueError) as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    verdict_file = None
+    if not args.no_verdicts:
+        verdict_file = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        stats = run_audit(args.input, verdict_file, args.engine, args.rule_set, args.max_steps,
+                          args.time_budget or None, args.workers, args.chunk_bytes)
+    finally:
+        if verdict_file not in (None, sys.stdout):
+            verdict_file.close()
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "input": args.input,
+        "engine": args.engine,
+        "rule_set": args.rule_set,
+        "max_steps": args.max_steps,
+        "seconds": elapsed,
+        "lines_per_sec": stats.lines / elapsed if elapsed else None,
+        **stats.to_dict(),
+    }
+    text = json.dumps(report, indent=2)
+    if args.stats is None:
+        print(text, file=sys.stderr)
+    else:
+        with open(args.stats, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
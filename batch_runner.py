@@ -0,0 +1,162 @@
+# batch_runner.py
+# Validasi banyak password sekaligus memakai process pool.
+# Setiap worker memuat rules terkompilasi SEKALI (lewat initializer, dari cache
+# disk rule_registry), lalu dipakai ulang untuk semua item yang dikirim ke worker.
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from rule_registry import DEFAULT_RULE_SET, registry
+from turing_machine import DEFAULT_MAX_STEPS, TuringMachine
+from tm_trace import TRACE_NONE
+
+# Batas default per item
+DEFAULT_TIME_BUDGET = 0.5 # detik
+
+# Item dikirim ke worker per potongan (chunk) agar overhead IPC tidak dominan
+CHUNK_SIZE = 32
+
+# Backpressure: jumlah chunk yang boleh "in-flight" di pool secara global
+# (per core), dan per request batch. Chunk berikutnya menunggu sampai ada slot.
+INFLIGHT_PER_WORKER = 2
+WINDOW_PER_BATCH = 8
+
+# Jumlah worker pool: env TM_BATCH_WORKERS, default semua core kecuali satu
+# (disisakan untuk thread request /run).
+DEFAULT_WORKERS = int(os.environ.get('TM_BATCH_WORKERS', 0)) or max(1, (os.cpu_count() or 1) - 1)
+
+
+def _init_worker():
+    """Initializer worker: muat semua rule set sekali per proses (dari cache disk)."""
+    registry.preload()
+
+
+def validate_one(password, max_steps=DEFAULT_MAX_STEPS, time_budget=DEFAULT_TIME_BUDGET,
+                 rule_set=DEFAULT_RULE_SET):
+    """Jalankan satu validasi tanpa trace. Dipanggil di dalam proses worker."""
+    tm = TuringMachine(input_string=password, rules=registry.get(rule_set),
+                       trace_level=TRACE_NONE, max_steps=max_steps, time_budget=time_budget)
+    result_data = tm.run()
+    # Pita TIDAK dikembalikan: isinya adalah password itu sendiri
+    return {
+        "result": result_data["result"],
+        "status": result_data["status"],
+        "steps": result_data["steps"],
+    }
+
+
+def validate_chunk(passwords, max_steps=DEFAULT_MAX_STEPS, time_budget=DEFAULT_TIME_BUDGET,
+                   rule_set=DEFAULT_RULE_SET):
+    """Validasi satu chunk password di worker; time_budget berlaku per item."""
+    return [validate_one(password, max_steps, time_budget, rule_set) for password in passwords]
+
+
+class BatchRunner:
+    """
+    Process pool (lazy, dibuat saat batch pertama) untuk endpoint /run/batch.
+
+    Urutan output selalu sama dengan urutan input. Jumlah item yang sedang
+    dikerjakan dibatasi secara global (semaphore) sehingga satu batch besar
+    tidak memenuhi antrean pool, dan pool default menyisakan satu core untuk
+    request /run (yang berjalan di thread request sendiri).
+
+    Jika sebuah worker mati (BrokenProcessPool), item yang terdampak
+    mendapat verdict ERROR dan pool dibuat ulang untuk chunk berikutnya.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or DEFAULT_WORKERS
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers * INFLIGHT_PER_WORKER)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # 'spawn' aman dipakai dari server Flask yang multi-thread
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _discard_executor(self, executor):
+        """Buang pool yang rusak (jika belum diganti thread lain); pool baru dibuat saat submit berikutnya."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, passwords, max_steps=DEFAULT_MAX_STEPS, time_budget=DEFAULT_TIME_BUDGET,
+            rule_set=DEFAULT_RULE_SET):
+        """
+        Generator: yield dict verdict per input, sesuai urutan input.
+        Setiap dict berisi 'index' dan hasil validate_one (atau 'error').
+        """
+        pending = deque()
+
+        def take():
+            first_index, chunk, executor, future = pending.popleft()
+            try:
+                verdicts = future.result()
+            except BrokenProcessPool as e:
+                self._discard_executor(executor)
+                verdicts = [{"result": "ERROR", "error": f"Worker batch berhenti: {e}"}] * len(chunk)
+            except Exception as e:
+                verdicts = [{"result": "ERROR", "error": str(e)}] * len(chunk)
+            for offset, verdict in enumerate(verdicts):
+                yield {"index": first_index + offset, **verdict}
+
+        def submit(first_index, chunk):
+            self._slots.acquire()
+            executor = None
+            # Pool bisa sudah rusak sejak batch lain: buat ulang sekali, lalu menyerah
+            for _attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    future = executor.submit(validate_chunk, chunk, max_steps, time_budget, rule_set)
+                    break
+                except BrokenProcessPool as e:
+                    self._discard_executor(executor)
+                    future = Future()
+                    future.set_exception(e)
+                except Exception:
+                    self._slots.release()
+                    raise
+            future.add_done_callback(lambda _f: self._slots.release())
+            pending.append((first_index, chunk, executor, future))
+
+        chunk = []
+        chunk_start = 0
+        for index, password in enumerate(passwords):
+            if not chunk:
+                chunk_start = index
+            chunk.append(password)
+            if len(chunk) < CHUNK_SIZE:
+                continue
+
+            # Kirim hasil yang sudah selesai lebih dulu (tetap berurutan)
+            while pending and pending[0][3].done():
+                yield from take()
+            if len(pending) >= WINDOW_PER_BATCH:
+                yield from take()
+
+            submit(chunk_start, chunk)
+            chunk = []
+
+        if chunk:
+            submit(chunk_start, chunk)
+
+        while pending:
+            yield from take()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,310 @@
+# benchmark.py
+# Benchmark offline untuk mesin Turing & endpoint /run. Hasil ditulis sebagai
+# JSON supaya beberapa run (misal sebelum/sesudah perubahan) bisa dibandingkan.
+#
+#   python benchmark.py                      # semua bagian, tulis ke benchmark.json
+#   python benchmark.py --quick -o hasil.json
+#   python benchmark.py --only engine,http
+
+import argparse
+import gc
+import importlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from password_rules import lowercase, numbers, specials, uppercase
+from rule_registry import RuleRegistry
+from tm_compiler import CompiledRules
+from tm_trace import TRACE_LEVELS, TRACE_NONE
+from turing_machine import DEFAULT_MAX_STEPS, TuringMachine
+
+CLASSES = {'lower': lowercase, 'upper': uppercase, 'number': numbers, 'special': specials}
+SECTIONS = ('engine', 'step', 'tables', 'memory', 'http')
+
+
+# --- 1. Korpus Password Sintetis ---
+
+def random_password(rng, length, classes):
+    """Password acak sepanjang `length` yang hanya memakai kelas karakter `classes`."""
+    pool = ''.join(''.join(CLASSES[name]) for name in classes)
+    return ''.join(rng.choice(pool) for _ in range(length))
+
+
+def near_limit_password(rng, rules, max_steps=DEFAULT_MAX_STEPS, ratio=0.9):
+    """
+    Password valid yang butuh langkah mendekati max_steps: karakter wajib
+    (lowercase, uppercase, angka, simbol) diletakkan di akhir sehingga setiap
+    fase find menyapu hampir seluruh pita.
+    """
+    tail = rng.choice(lowercase) + rng.choice(uppercase) + rng.choice(numbers) + rng.choice(specials)
+    low, high = 1, 4 * max_steps
+    while low < high:
+        # Cari panjang padding terbesar yang langkahnya masih <= ratio * max_steps
+        mid = (low + high + 1) // 2
+        steps = TuringMachine('a' * mid + tail, rules, trace_level=TRACE_NONE,
+                              max_steps=10 * max_steps).run()['steps']
+        if steps <= ratio * max_steps:
+            low = mid
+        else:
+            high = mid - 1
+    return random_password(rng, low, ['lower']) + tail
+
+
+def generate_corpus(size=1000, seed=0, rules=None, max_steps=DEFAULT_MAX_STEPS):
+    """
+    Korpus campuran: panjang 0-64 dengan berbagai kombinasi kelas karakter,
+    ditambah ~5% input yang langkahnya mendekati max_steps.
+    Return list of (kategori, password).
+    """
+    rng = random.Random(seed)
+    mixes = [
+        ['lower'], ['lower', 'number'], ['lower', 'upper'],
+        ['lower', 'upper', 'number'], ['lower', 'upper', 'number', 'special'],
+        ['upper', 'special'],
+    ]
+    n_near = max(1, size // 20) if rules is not None else 0
+    corpus = []
+    for _ in range(size - n_near):
+        classes = rng.choice(mixes)
+        length = rng.choice([rng.randint(0, 7), rng.randint(8, 16), rng.randint(17, 64)])
+        corpus.append((f"{len(classes)}class", random_password(rng, length, classes)))
+    for _ in range(n_near):
+        corpus.append(("near_limit", near_limit_password(rng, rules, max_steps)))
+    rng.shuffle(corpus)
+    return corpus
+
+
+# --- 2. Helper Pengukuran ---
+
+def percentiles(samples):
+    """Ringkasan latensi (detik) -> dict mikrodetik."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6
+
+    return {
+        "count": len(ordered),
+        "mean_us": sum(ordered) / len(ordered) * 1e6,
+        "p50_us": pick(0.50),
+        "p90_us": pick(0.90),
+        "p99_us": pick(0.99),
+        "max_us": ordered[-1] * 1e6,
+    }
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+# --- 3. Bagian Benchmark ---
+
+def bench_engine(corpus, rules, max_steps):
+    """run() per trace level: langkah/detik dan latensi per panggilan."""
+    results = {}
+    for level in TRACE_LEVELS:
+        latencies = []
+        total_steps = 0
+        for _category, password in corpus:
+            tm = TuringMachine(password, rules, trace_level=level, max_steps=max_steps)
+            start = time.perf_counter()
+            result = tm.run() # Termasuk biaya format log (seperti di /run)
+            latencies.append(time.perf_counter() - start)
+            total_steps += result['steps']
+        total = sum(latencies)
+        results[level] = {
+            "steps": total_steps,
+            "steps_per_sec": total_steps / total if total else None,
+            "latency": percentiles(latencies),
+        }
+    return results
+
+
+def bench_step(corpus, rules, max_steps):
+    """Loop step() manual (jalur yang dipakai run_iter / streaming)."""
+    latencies = []
+    total_steps = 0
+    for _category, password in corpus:
+        tm = TuringMachine(password, rules, trace_level=TRACE_NONE, max_steps=max_steps)
+        start = time.perf_counter()
+        while tm.step_count < max_steps and tm.step():
+            pass
+        latencies.append(time.perf_counter() - start)
+        total_steps += tm.step_count
+    total = sum(latencies)
+    return {
+        "steps": total_steps,
+        "steps_per_sec": total_steps / total if total else None,
+        "latency": percentiles(latencies),
+    }
+
+
+def bench_tables(repeat):
+    """Biaya membangun tabel transisi: import password_rules, compile, registry dingin/hangat."""
+    import password_rules
+    import tempfile
+
+    results = {}
+    samples = []
+    for _ in range(repeat):
+        elapsed, _module = timed(importlib.reload, password_rules)
+        samples.append(elapsed)
+    results["password_rules_import"] = percentiles(samples)
+
+    samples = []
+    for _ in range(repeat):
+        samples.append(timed(CompiledRules, password_rules.password_rules_dict)[0])
+    results["compile_rules"] = percentiles(samples)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in RuleRegistry().names():
+            cold = [timed(RuleRegistry(cache_dir=False).get, name)[0] for _ in range(repeat)]
+            RuleRegistry(cache_dir=cache_dir).get(name) # Isi cache disk
+            warm = [timed(RuleRegistry(cache_dir=cache_dir).get, name)[0] for _ in range(repeat)]
+            results[f"registry_{name}_cold"] = percentiles(cold)
+            results[f"registry_{name}_disk_cache"] = percentiles(warm)
+    return results
+
+
+def bench_memory(corpus, rules, max_steps):
+    """Puncak memori (tracemalloc) untuk trace & pita, per trace level."""
+    longest = max((password for _category, password in corpus), key=len)
+    inputs = {"longest_in_corpus": longest, "long_tape_100k": 'a' * 100000}
+    results = {}
+    for label, password in inputs.items():
+        for level in TRACE_LEVELS:
+            gc.collect()
+            tracemalloc.start()
+            tm = TuringMachine(password, rules, trace_level=level, max_steps=max_steps)
+            result = tm.run()
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[f"{label}/{level}"] = {
+                "input_length": len(password),
+                "steps": result['steps'],
+                "peak_bytes": peak,
+                "tape_buffer_bytes": len(memoryview(tm._cells).cast('B')),
+            }
+    return results
+
+
+def bench_http(corpus, requests_per_level, max_steps, rule_set):
+    """Load driver /run memakai Flask test client: latensi & ukuran response."""
+    os.environ.setdefault('TM_RESULT_CACHE_ENTRIES', '0') # Ukur simulasi, bukan cache
+    from app import app
+
+    client = app.test_client()
+    passwords = [password for _category, password in corpus][:requests_per_level]
+    results = {}
+    for level in TRACE_LEVELS:
+        latencies = []
+        sizes = []
+        errors = 0
+        for password in passwords:
+            data = {'input_string': password, 'trace_level': level, 'max_steps': str(max_steps),
+                    'rule_set': rule_set}
+            elapsed, response = timed(client.post, '/run', data=data)
+            latencies.append(elapsed)
+            sizes.append(len(response.get_data()))
+            errors += response.status_code != 200
+        results[level] = {
+            "requests": len(passwords),
+            "errors": errors,
+            "requests_per_sec": len(passwords) / sum(latencies) if latencies else None,
+            "latency": percentiles(latencies),
+            "response_bytes": {
+                "mean": sum(sizes) / len(sizes) if sizes else 0,
+                "max": max(sizes, default=0),
+            },
+        }
+    return results
+
+
+# --- 4. Main ---
+
+def environment_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit or None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline Turing Machine validator.")
+    parser.add_argument('-o', '--output', default='benchmark.json', help="file JSON hasil ('-' = stdout)")
+    parser.add_argument('--quick', action='store_true', help="korpus & jumlah ulangan kecil")
+    parser.add_argument('--only', default=','.join(SECTIONS), help=f"bagian: {','.join(SECTIONS)}")
+    parser.add_argument('--rule-set', default='multi_sweep', help="nama rule set (rule_sets/<nama>.json)")
+    parser.add_argument('--corpus-size', type=int, default=None)
+    parser.add_argument('--max-steps', type=int, default=DEFAULT_MAX_STEPS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    sections = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"bagian tidak dikenal: {sorted(unknown)}")
+
+    rules = RuleRegistry().get(args.rule_set)
+    size = args.corpus_size or (200 if args.quick else 2000)
+    repeat = 3 if args.quick else 10
+    corpus = generate_corpus(size, args.seed, rules, args.max_steps)
+
+    report = {
+        "environment": environment_info(),
+        "config": {
+            "rule_set": args.rule_set,
+            "corpus_size": len(corpus),
+            "max_steps": args.max_steps,
+            "seed": args.seed,
+            "quick": args.quick,
+        },
+        "corpus": {
+            category: sum(1 for c, _p in corpus if c == category)
+            for category in sorted({c for c, _p in corpus})
+        },
+        "results": {},
+    }
+
+    runners = {
+        'engine': lambda: bench_engine(corpus, rules, args.max_steps),
+        'step': lambda: bench_step(corpus, rules, args.max_steps),
+        'tables': lambda: bench_tables(repeat),
+        'memory': lambda: bench_memory(corpus, rules, args.max_steps),
+        'http': lambda: bench_http(corpus, min(len(corpus), 100 if args.quick else 500), args.max_steps,
+                                   args.rule_set),
+    }
+    for name in sections:
+        print(f"[benchmark] {name} ...", file=sys.stderr)
+        report["results"][name] = runners[name]()
+
+    text = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+        print(f"[benchmark] hasil ditulis ke {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
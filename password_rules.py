@@ -1,5 +1,7 @@
 # password_rules.py
 
+from tm_compiler import compile_rules
+
 # --- 1. Definisi Alfabet (Sesuai PDF Bagian 2) ---
 lowercase = list('abcdefghijklmnopqrstuvwxyz')
 uppercase = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
@@ -119,4 +121,9 @@ add_search_transitions('q_find_spec', specials, SPC, accept_state)
 
 # --- 6. Ekspor Rules ---
 # PENTING: Format ini disesuaikan agar langsung bisa dibaca turing_machine.py
-password_rules_dict = transitions
\ No newline at end of file
+password_rules_dict = transitions
+
+# Versi terkompilasi (tabel padat berbasis integer) untuk TuringMachine.
+# Jalur tercepat: TuringMachine(password, password_rules_compiled) tidak perlu
+# mengecek atau mengompilasi ulang rules dict di setiap konstruksi.
+password_rules_compiled = compile_rules(password_rules_dict)
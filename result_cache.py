@@ -0,0 +1,272 @@
+# result_cache.py
+# Cache hasil /run. Input yang sama (dengan rule set & parameter yang sama)
+# selalu menghasilkan hasil TuringMachine.run() yang sama, jadi hasilnya bisa
+# dipakai ulang. Password TIDAK pernah disimpan dalam bentuk teks:
+#   - kunci = HMAC-SHA256 (secret acak per proses) dari input + rule set + parameter,
+#   - pita akhir disimpan sebagai daftar sel yang BERBEDA dari input (marker dll),
+#   - trace delta disimpan tanpa pita awal, dan simbol tulis yang sama dengan
+#     simbol yang dibaca diganti None.
+# Semua bagian itu dibangun ulang dari input request saat cache hit.
+# Trace 'full' tidak di-cache: membangun ulang log per langkah sama mahalnya
+# dengan menjalankan mesin lagi (dan run biasa menghormati trace_limit).
+
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from tm_trace import (
+    TAPE_WINDOW, TRACE_DELTA, TRACE_FULL, TRACE_NONE, TRACE_SUMMARY, DeltaTrace, TraceLog, format_summary,
+)
+
+# Hasil yang bergantung pada jam (bukan hanya input) tidak di-cache
+UNCACHEABLE_RESULTS = ("TIMEOUT (Waktu habis)",)
+
+
+def _initial_cells(compiled, input_string):
+    """Id simbol pita awal (sama seperti konstruktor TuringMachine) + nama simbol run ini."""
+    ids, names = compiled.encode_input(input_string)
+    return ids or [0], names
+
+
+def _replay(initial_ids, steps, redact):
+    """
+    Jalankan ulang langkah trace delta di atas pita awal. redact=True: ganti
+    simbol tulis yang sama dengan isi sel menjadi None; False: kebalikannya.
+    """
+    written = {}
+    replayed = []
+    n_initial = len(initial_ids)
+    for new_state, head, write, move in steps:
+        current = written.get(head, initial_ids[head] if 0 <= head < n_initial else 0)
+        if redact:
+            replayed.append((new_state, head, None if write == current else write, move))
+        else:
+            write = current if write is None else write
+            replayed.append((new_state, head, write, move))
+        written[head] = write if write is not None else current
+    return replayed
+
+
+def compact_result(tm, result_data, store_trace=True):
+    """Bentuk ringkas (tanpa teks password) dari hasil tm.run() untuk disimpan di cache."""
+    origin = tm.tape_origin
+    tape = result_data["tape"]
+    text = tm.input_string
+
+    def initial(i):
+        return text[i] if 0 <= i < len(text) else tm.blank_symbol
+
+    edits = [(i - origin, symbol) for i, symbol in enumerate(tape) if symbol != initial(i - origin)]
+    # Hanya baris teks (misal pesan error); entri langkah berisi potongan pita = password
+    log = [line for line in tm.trace_log.entries
+           if isinstance(line, str) and not line.startswith("SUMMARY |")]
+
+    entry = {
+        "result": result_data["result"],
+        "status": result_data["status"],
+        "steps": result_data["steps"],
+        "head_position": result_data["head_position"],
+        "tape": (origin, len(tape), edits),
+        "log": log,
+    }
+    if tm.halted_without_rule:
+        entry["halted_from"] = tm.halted_from # Nama state saja (untuk baris HALT di stream delta)
+    if store_trace and "trace" in result_data:
+        initial_ids, _names = _initial_cells(tm.compiled, text)
+        entry["trace"] = _replay(initial_ids, result_data["trace"]["steps"], redact=True)
+    return entry
+
+
+def restore_result(entry, input_string, compiled, trace_level, blank_symbol='B'):
+    """
+    Bangun ulang dict hasil (format sama dengan TuringMachine.run()) dari entri
+    cache dan input request. Return None jika entri tidak cukup untuk
+    trace_level ini (misalnya trace delta tidak ikut disimpan, atau level 'full').
+    """
+    if trace_level == TRACE_FULL or (trace_level == TRACE_DELTA and "trace" not in entry):
+        return None
+
+    origin, length, edits = entry["tape"]
+    edits = dict(edits)
+    cells = []
+    for i in range(-origin, length - origin):
+        if i in edits:
+            cells.append(edits[i])
+        else:
+            cells.append(input_string[i] if 0 <= i < len(input_string) else blank_symbol)
+    tape = "".join(cells)
+
+    result_data = {
+        "result": entry["result"],
+        "status": entry["status"],
+        "steps": entry["steps"],
+        "tape": tape,
+        "head_position": entry["head_position"],
+    }
+
+    log = TraceLog(compiled.state_names, compiled.symbol_names)
+    for line in entry["log"]:
+        log.append(line)
+    if trace_level == TRACE_SUMMARY:
+        log.append(format_summary(entry["steps"], entry["status"], entry["head_position"], tape))
+    result_data["log"] = log.to_list()
+
+    if trace_level == TRACE_DELTA:
+        initial_ids, names = _initial_cells(compiled, input_string)
+        trace = DeltaTrace(compiled.state_names, names, compiled.start_id, initial_ids)
+        trace.steps = _replay(initial_ids, entry["trace"], redact=False)
+        result_data["trace"] = trace.to_dict()
+    return result_data
+
+
+def delta_stream_log(entry, result_data):
+    """
+    Baris 'log' untuk event result stream delta (lihat TuringMachine.run_iter):
+    baris HALT (dibangun dari pita akhir hasil restore_result) dan pesan error.
+    """
+    lines = []
+    if "halted_from" in entry:
+        symbols = list(result_data["tape"])
+        head = result_data["head_position"]
+        start = max(0, head - TAPE_WINDOW)
+        end = min(len(symbols), head + TAPE_WINDOW)
+        # Sel pita memakai index ke `symbols`, state memakai index ke [halted_from]
+        log = TraceLog([entry["halted_from"]], symbols)
+        lines.append(log.format_entry((entry["steps"], 0, head, start, len(symbols), range(start, end), None)))
+    return lines + list(result_data["log"])
+
+
+class ResultCache:
+    """
+    Cache LRU berbatas (jumlah entri dan/atau perkiraan ukuran byte) dengan TTL.
+    Aman dipakai dari banyak thread request. Penghitung hits/misses/evictions
+    (ditambah expirations) tersedia lewat stats().
+    """
+
+    def __init__(self, max_entries=4096, max_bytes=None, ttl=300.0, secret=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Salt/kunci HMAC: acak per proses kecuali diberikan (misal dari env)
+        self._secret = secret or os.urandom(32)
+        self._entries = OrderedDict() # kunci -> (expires_at, size, entry)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, rule_identity, input_string, **params):
+        """Kunci cache: HMAC dari identitas rule set, parameter run, dan input."""
+        message = json.dumps([rule_identity, sorted(params.items()), input_string])
+        return hmac.new(self._secret, message.encode('utf-8', 'surrogatepass'), hashlib.sha256).digest()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, size, entry = item
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        size = len(key) + len(json.dumps(entry))
+        if self.max_bytes is not None and size > self.max_bytes:
+            return # Terlalu besar untuk cache
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (time.monotonic() + self.ttl, size, entry)
+            self._bytes += size
+            # Buang entri paling lama tidak dipakai sampai batas terpenuhi
+            while (len(self._entries) > self.max_entries
+                   or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                _key, (_expires, old_size, _entry) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def check_roundtrip(rules, samples=2000, seed=0, max_steps=(1000, 37), trace_limits=(None, 5)):
+    """
+    Harness ekuivalensi cache: untuk input acak, bandingkan TuringMachine.run()
+    dengan restore_result(compact_result(...)) di setiap level yang di-cache,
+    plus baris log stream delta (delta_stream_log vs TuringMachine.run_iter).
+    Return list mismatch: (input, trace_level, max_steps, trace_limit).
+    """
+    from tm_compiler import compile_rules
+    from turing_machine import TuringMachine
+
+    compiled = compile_rules(rules)
+    rng = random.Random(seed)
+    pool = sorted({s for state in compiled.rules.values() for s in state}) + [' ', 'é']
+    inputs = ["", compiled.blank_symbol, "Abcdefg1!", "Abcdefg!1", "abc def1A!"]
+    inputs += [''.join(rng.choice(pool) for _ in range(rng.randint(0, 24))) for _ in range(samples)]
+
+    mismatches = []
+    for text in inputs:
+        for steps in max_steps:
+            for limit in trace_limits:
+                for level in (TRACE_NONE, TRACE_SUMMARY, TRACE_DELTA):
+                    tm = TuringMachine(text, compiled, trace_level=level, trace_limit=limit, max_steps=steps)
+                    fresh = tm.run()
+                    entry = json.loads(json.dumps(compact_result(tm, fresh))) # Seperti tersimpan
+                    restored = restore_result(entry, text, compiled, level, compiled.blank_symbol)
+                    if json.dumps(restored) != json.dumps(fresh): # Dibandingkan sebagai JSON response
+                        mismatches.append((text, level, steps, limit))
+                    elif level == TRACE_DELTA:
+                        stream = TuringMachine(text, compiled, trace_level=level, max_steps=steps)
+                        live = [payload for kind, payload in stream.run_iter() if kind == 'result'][0]
+                        if delta_stream_log(entry, restored) != live['log']:
+                            mismatches.append((text, 'delta_stream', steps, limit))
+    return mismatches
+
+
+if __name__ == '__main__':
+    # python result_cache.py [jumlah_sampel]
+    from rule_registry import registry
+
+    n_samples = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    total = 0
+    for name in registry.names():
+        mismatches = check_roundtrip(registry.get(name), samples=n_samples)
+        total += len(mismatches)
+        for mismatch in mismatches[:20]:
+            print(f"MISMATCH {name}: {mismatch!r}")
+    print(f"{total} mismatch dari {n_samples + 5} input acak per rule set.")
+    sys.exit(1 if total else 0)
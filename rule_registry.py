@@ -0,0 +1,324 @@
+# rule_registry.py
+# Registry rule set bernama. Setiap mesin ditulis deklaratif sebagai file JSON
+# di folder rule_sets/, divalidasi & dikompilasi sekali, lalu hasil kompilasinya
+# disimpan di disk (pickle) dengan kunci hash isi file. Proses berikutnya
+# (misalnya worker batch yang baru di-spawn) cukup memuat cache tersebut.
+#
+# Format file (<nama>.json):
+#   {
+#     "start_state": "q0", "accept_state": "q_accept", "reject_state": "q_reject",
+#     "blank_symbol": "B",
+#     "symbol_sets": {"digit": "0123456789", "semua": ["digit", ...]},
+#     "transitions": [
+#       {"state": "q0", "read": "B", "read_sets": ["digit"], "except": "...",
+#        "except_sets": [...], "next": "q1", "write": "x", "move": "R"}, ...
+#     ]
+#   }
+# - Simbol adalah satu karakter; "read"/"except" berupa string berisi simbol.
+# - Himpunan di "symbol_sets" berupa string simbol atau list nama himpunan lain.
+#   Blank tidak pernah ikut dari read_sets; tulis eksplisit di "read".
+# - "next" default = state yang sama, "write" default = simbol yang dibaca.
+# - Satu pasangan (state, simbol) hanya boleh muncul sekali.
+# Mesin turunan: {"derive": "single_pass", "base": "<nama rule set lain>"}.
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+
+from tm_compiler import compile_rules
+
+RULE_SET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rule_sets')
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'rule_sets')
+DEFAULT_RULE_SET = 'multi_sweep'
+
+# Naikkan jika format CompiledRules berubah, supaya cache lama tidak dipakai
+CACHE_VERSION = 1
+
+# Modul yang menentukan hasil kompilasi/derivasi; isinya ikut kunci cache disk,
+# sehingga perubahan kode compiler atau tm_dfa otomatis membuat cache baru.
+CODE_MODULES = ('tm_compiler.py', 'tm_dfa.py', 'rule_registry.py')
+
+
+def _code_hash():
+    digest = hashlib.sha256()
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for module in CODE_MODULES:
+        with open(os.path.join(base_dir, module), 'rb') as f:
+            digest.update(module.encode() + b'\0' + f.read())
+    return digest.hexdigest()
+
+
+CODE_HASH = _code_hash()
+
+MOVES = ('L', 'R', 'S')
+
+
+class RuleSetError(ValueError):
+    """File rule set tidak valid atau tidak ditemukan."""
+
+
+def _derive_single_pass(base):
+    from tm_dfa import compile_dfa
+    dfa = compile_dfa(base)
+    accept_state = base.state_names[base.accept_id]
+    reject_state = base.state_names[base.reject_id]
+    return compile_rules(dfa.to_rules(accept_state, reject_state), dfa.start_state,
+                         accept_state, reject_state, base.blank_symbol)
+
+
+# Transformasi yang boleh dipakai di "derive": CompiledRules basis -> CompiledRules baru
+DERIVATIONS = {
+    'single_pass': _derive_single_pass,
+}
+
+
+def parse_rule_set(spec, source='<rule set>'):
+    """
+    Validasi spesifikasi rule set (dict hasil json.load) lalu ubah menjadi
+    rules dict biasa. Return: (rules, start_state, accept_state, reject_state, blank_symbol).
+    Raise RuleSetError dengan pesan yang menyebut sumber & lokasi kesalahan.
+    """
+    def fail(message):
+        raise RuleSetError(f"{source}: {message}")
+
+    if not isinstance(spec, dict):
+        fail("isi file harus berupa object JSON")
+
+    def symbol_string(value, where):
+        if not isinstance(value, str):
+            fail(f"{where} harus berupa string simbol")
+        return value
+
+    start_state = spec.get('start_state', 'q0')
+    accept_state = spec.get('accept_state', 'q_accept')
+    reject_state = spec.get('reject_state', 'q_reject')
+    blank_symbol = spec.get('blank_symbol', 'B')
+    for key, value in (('start_state', start_state), ('accept_state', accept_state),
+                       ('reject_state', reject_state)):
+        if not isinstance(value, str) or not value:
+            fail(f"'{key}' harus berupa string tidak kosong")
+    if not isinstance(blank_symbol, str) or len(blank_symbol) != 1:
+        fail("'blank_symbol' harus satu karakter")
+
+    # 1. Himpunan simbol bernama (boleh tersusun dari himpunan lain)
+    raw_sets = spec.get('symbol_sets', {})
+    if not isinstance(raw_sets, dict):
+        fail("'symbol_sets' harus berupa object")
+    resolved = {}
+
+    def resolve(name, trail=()):
+        if name in resolved:
+            return resolved[name]
+        if name not in raw_sets:
+            fail(f"himpunan simbol '{name}' tidak didefinisikan")
+        if name in trail:
+            fail(f"himpunan simbol '{name}' merujuk dirinya sendiri")
+        value = raw_sets[name]
+        if isinstance(value, str):
+            symbols = set(value)
+        elif isinstance(value, list):
+            symbols = set()
+            for part in value:
+                symbols |= resolve(part, trail + (name,))
+        else:
+            fail(f"himpunan simbol '{name}' harus berupa string atau list nama himpunan")
+        resolved[name] = symbols
+        return symbols
+
+    def expand(entry, text_key, sets_key, where):
+        symbols = set(symbol_string(entry.get(text_key, ''), f"{where}: '{text_key}'"))
+        names = entry.get(sets_key, [])
+        if not isinstance(names, list):
+            fail(f"{where}: '{sets_key}' harus berupa list nama himpunan")
+        for name in names:
+            symbols |= resolve(name) - {blank_symbol}
+        return symbols
+
+    # 2. Transisi
+    transitions = spec.get('transitions')
+    if not isinstance(transitions, list) or not transitions:
+        fail("'transitions' harus berupa list yang tidak kosong")
+
+    rules = {}
+    for index, entry in enumerate(transitions):
+        where = f"transitions[{index}]"
+        if not isinstance(entry, dict):
+            fail(f"{where} harus berupa object")
+        unknown = set(entry) - {'state', 'read', 'read_sets', 'except', 'except_sets',
+                                'next', 'write', 'move'}
+        if unknown:
+            fail(f"{where}: field tidak dikenal {sorted(unknown)}")
+
+        state = entry.get('state')
+        if not isinstance(state, str) or not state:
+            fail(f"{where}: 'state' wajib diisi")
+        if state in (accept_state, reject_state):
+            fail(f"{where}: state halting '{state}' tidak boleh punya transisi")
+        next_state = entry.get('next', state)
+        if not isinstance(next_state, str) or not next_state:
+            fail(f"{where}: 'next' harus berupa nama state")
+        move = entry.get('move')
+        if move not in MOVES:
+            fail(f"{where}: 'move' harus salah satu dari {list(MOVES)}")
+        write = entry.get('write')
+        if write is not None and (not isinstance(write, str) or len(write) != 1):
+            fail(f"{where}: 'write' harus satu karakter")
+
+        symbols = expand(entry, 'read', 'read_sets', where)
+        symbols -= expand(entry, 'except', 'except_sets', where)
+        if not symbols:
+            fail(f"{where}: tidak ada simbol yang dibaca")
+
+        state_rules = rules.setdefault(state, {})
+        for symbol in sorted(symbols):
+            if symbol in state_rules:
+                fail(f"{where}: transisi ({state}, '{symbol}') sudah didefinisikan")
+            state_rules[symbol] = [next_state, write if write is not None else symbol, move]
+
+    # 3. Semua state tujuan harus punya transisi atau berupa state halting
+    if start_state not in rules:
+        fail(f"start_state '{start_state}' tidak punya transisi")
+    for state, state_rules in rules.items():
+        for symbol, (next_state, _write, _move) in state_rules.items():
+            if next_state not in rules and next_state not in (accept_state, reject_state):
+                fail(f"state tujuan '{next_state}' (dari {state}, '{symbol}') tidak didefinisikan")
+
+    return rules, start_state, accept_state, reject_state, blank_symbol
+
+
+class RuleRegistry:
+    """
+    Daftar rule set bernama dari folder `directory` (satu file <nama>.json per
+    mesin). get(nama) mengembalikan CompiledRules; hasilnya di-cache di memori
+    proses dan di disk (`cache_dir`, default .cache/rule_sets atau env
+    TM_RULE_CACHE_DIR). cache_dir=False mematikan cache disk.
+    """
+
+    def __init__(self, directory=RULE_SET_DIR, cache_dir=None):
+        self.directory = directory
+        if cache_dir is None:
+            cache_dir = os.environ.get('TM_RULE_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.cache_dir = cache_dir or None
+        self._loaded = {}
+        self._hashes = {} # Hash isi file untuk setiap rule set yang sudah dimuat
+        self._lock = threading.RLock()
+
+    def names(self):
+        """Nama semua rule set yang tersedia (urut abjad)."""
+        try:
+            files = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in files if name.endswith('.json'))
+
+    def __contains__(self, name):
+        # Rule set yang sudah dimuat tidak perlu membaca isi folder lagi
+        return isinstance(name, str) and (name in self._loaded or name in self.names())
+
+    def get(self, name):
+        """CompiledRules untuk rule set `name` (raise RuleSetError jika tidak ada/invalid)."""
+        compiled = self._loaded.get(name)
+        if compiled is None:
+            with self._lock:
+                compiled = self._load(name, ())[1]
+        return compiled
+
+    def identity(self, name):
+        """Identitas rule set untuk kunci cache: nama + hash isi file (berubah jika file diubah)."""
+        self.get(name)
+        return f"{name}:{self._hashes[name]}"
+
+    def base_name(self, name):
+        """Nama rule set basis jika `name` adalah mesin turunan ("derive"), selain itu None."""
+        try:
+            spec = json.loads(self._read(name))
+        except ValueError as e:
+            raise RuleSetError(f"{name}.json: JSON tidak valid ({e})") from e
+        if isinstance(spec, dict) and 'derive' in spec:
+            return spec.get('base')
+        return None
+
+    def preload(self, names=None):
+        """Muat (dari cache disk jika ada) semua rule set, misalnya saat worker start."""
+        for name in names or self.names():
+            self.get(name)
+
+    def _read(self, name):
+        if not isinstance(name, str) or name not in self.names():
+            raise RuleSetError(f"rule set '{name}' tidak ditemukan di {self.directory}")
+        with open(os.path.join(self.directory, f"{name}.json"), 'rb') as f:
+            return f.read()
+
+    def _load(self, name, trail):
+        """Return (content_hash, CompiledRules). `trail` mencegah derive melingkar."""
+        if name in trail:
+            raise RuleSetError(f"rule set '{name}' diturunkan secara melingkar")
+
+        content = self._read(name)
+        source = f"{name}.json"
+        try:
+            spec = json.loads(content)
+        except ValueError as e:
+            raise RuleSetError(f"{source}: JSON tidak valid ({e})") from e
+
+        # Kunci cache: versi kode + hash isi file (ditambah hash basis untuk mesin turunan)
+        digest = hashlib.sha256(f"v{CACHE_VERSION}\0{CODE_HASH}\0".encode() + content)
+        base = None
+        if isinstance(spec, dict) and 'derive' in spec:
+            if spec['derive'] not in DERIVATIONS:
+                raise RuleSetError(f"{source}: 'derive' harus salah satu dari {list(DERIVATIONS)}")
+            base_hash, base = self._load(spec.get('base'), trail + (name,))
+            digest.update(base_hash.encode())
+        content_hash = digest.hexdigest()
+
+        cached = self._loaded.get(name)
+        if cached is not None and self._hashes.get(name) == content_hash:
+            return content_hash, cached
+
+        compiled = self._read_cache(name, content_hash)
+        if compiled is None:
+            if base is not None:
+                compiled = DERIVATIONS[spec['derive']](base)
+            else:
+                compiled = compile_rules(*parse_rule_set(spec, source))
+            self._write_cache(name, content_hash, compiled)
+
+        self._loaded[name] = compiled
+        self._hashes[name] = content_hash
+        return content_hash, compiled
+
+    def _cache_path(self, name, content_hash):
+        return os.path.join(self.cache_dir, f"{name}-{content_hash[:16]}.pickle")
+
+    def _read_cache(self, name, content_hash):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(name, content_hash), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None # Cache tidak ada / rusak -> kompilasi ulang
+
+    def _write_cache(self, name, content_hash, compiled):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Tulis ke file sementara lalu rename, supaya worker lain tidak membaca file setengah jadi
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._cache_path(name, content_hash))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"Gagal menulis cache rule set '{name}': {e}")
+
+
+# Registry bersama untuk app.py dan worker batch
+registry = RuleRegistry()
@@ -54,13 +54,35 @@ document.addEventListener('DOMContentLoaded', () => {
     const overlayAccept = document.getElementById('result-accepted');
     const overlayReject = document.getElementById('result-rejected');
 
-    // Variabel global untuk interval animasi
+    // Variabel global untuk interval animasi & stream yang sedang berjalan
     let animationInterval = null;
+    let streamController = null;
 
     // ===========================================
     // 2. Fungsi Visualisasi Pita (Render Tape)
     // ===========================================
 
+    function setCellSymbol(cellDiv, symbol) {
+        cellDiv.dataset.symbol = symbol;
+
+        // Cek apakah simbol adalah Blank ('_' atau 'B' atau spasi)
+        const isBlank = (symbol === '_' || symbol === 'B' || symbol === ' ');
+
+        // Jika blank, kosongkan textContent agar visualnya bersih
+        // Jika bukan, tampilkan karakter aslinya
+        cellDiv.textContent = isBlank ? '' : symbol;
+
+        // Opsional: Beri sedikit opacity pada kotak kosong
+        cellDiv.style.opacity = isBlank ? "0.5" : "";
+    }
+
+    function createCell(symbol) {
+        const cellDiv = document.createElement('div');
+        cellDiv.className = 'tape-cell';
+        setCellSymbol(cellDiv, symbol);
+        return cellDiv;
+    }
+
     function renderTape(tapeData) {
         tapeContainer.innerHTML = '';
         
@@ -105,20 +127,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
         // Render setiap sel
         paddedCells.forEach((symbol, index) => {
-            const cellDiv = document.createElement('div');
-            cellDiv.className = 'tape-cell';
-            
-            // Cek apakah simbol adalah Blank ('_' atau 'B' atau spasi)
-            const isBlank = (symbol === '_' || symbol === 'B' || symbol === ' ');
-
-            // Jika blank, kosongkan textContent agar visualnya bersih
-            // Jika bukan, tampilkan karakter aslinya
-            cellDiv.textContent = isBlank ? '' : symbol;
-            
-            // Opsional: Beri sedikit opacity pada kotak kosong
-            if(isBlank) {
-                cellDiv.style.opacity = "0.5"; 
-            }
+            const cellDiv = createCell(symbol);
 
             // Highlight posisi Head saat ini
             if (index === adjustedHeadIndex) {
@@ -136,45 +145,100 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     // ===========================================
-    // 3. Logika Animasi & Parsing Log
+    // 3. Logika Animasi (Trace Delta)
     // ===========================================
 
-    // Helper: Mengambil data pita dari teks log baris "TAPE   : ... a [b] c ..."
-    function parseTapeFromLogLine(logLine) {
-        // Cari baris yang dimulai dengan "   TAPE   :"
-        const match = logLine.match(/TAPE\s+:\s+(.*)/);
-        if (!match) return null;
+    // Jumlah sel kosong yang selalu disiapkan di kiri/kanan head
+    const VIEW_PADDING = 10;
 
-        // Bersihkan string: hapus "..." dan spasi berlebih
-        let rawContent = match[1].replace(/\.\.\./g, " ").trim();
-        
-        // Pecah menjadi array berdasarkan spasi
-        const tokens = rawContent.split(/\s+/);
-        
-        let cells = [];
-        let headPos = 0;
+    function appendLog(text) {
+        // Tambah node teks (bukan textContent +=) agar tidak menyalin ulang seluruh log
+        logArea.appendChild(document.createTextNode(text + "\n"));
+        logArea.scrollTop = logArea.scrollHeight;
+    }
 
-        // Cari token yang dibungkus kurung siku, misal "[a]" yang menandakan head
-        tokens.forEach((token) => {
-            if (!token) return;
-            
-            if (token.startsWith('[') && token.endsWith(']')) {
-                // Ini adalah posisi Head
-                headPos = cells.length;
-                cells.push(token.slice(1, -1)); // Ambil char di dalamnya
-            } else {
-                cells.push(token);
-            }
+    function formatStepHeader(step, stateName) {
+        return `STEP ${String(step).padStart(3, '0')} | ${stateName.padEnd(10)} \n`;
+    }
+
+    // Bangun DOM pita SEKALI dari header trace delta (kamus + pita awal).
+    // Posisi logis p (relatif sel pertama pita awal) ada di view.cells[p + view.offset].
+    function createTapeView(trace) {
+        tapeContainer.innerHTML = '';
+        const view = {
+            trace: trace,
+            cells: [],
+            offset: VIEW_PADDING,
+            state: trace.start_state,
+            step: 0,
+            current: null
+        };
+
+        const blank = trace.symbols[0];
+        const symbols = [];
+        for (let i = 0; i < VIEW_PADDING; i++) symbols.push(blank);
+        trace.tape.forEach((id) => symbols.push(trace.symbols[id]));
+        for (let i = 0; i < VIEW_PADDING; i++) symbols.push(blank);
+
+        symbols.forEach((symbol) => {
+            const cellDiv = createCell(symbol);
+            view.cells.push(cellDiv);
+            tapeContainer.appendChild(cellDiv);
         });
 
-        return { cells: cells, head_position: headPos };
+        moveHead(view, 0);
+        appendLog(formatStepHeader(0, trace.states[view.state]) +
+                  "   ACTION : INITIALIZING TAPE\n" + '-'.repeat(40));
+        return view;
     }
 
-    function animateProcessing(data) {
-        const logs = data.log; 
-        let step = 0;
-        const totalSteps = logs.length;
-        
+    // Pindahkan penanda head; tambah sel kosong hanya jika head mendekati tepi
+    function moveHead(view, pos) {
+        const blank = view.trace.symbols[0];
+        while (pos + view.offset < VIEW_PADDING) {
+            const cellDiv = createCell(blank);
+            tapeContainer.insertBefore(cellDiv, tapeContainer.firstChild);
+            view.cells.unshift(cellDiv);
+            view.offset++;
+        }
+        while (pos + view.offset >= view.cells.length - VIEW_PADDING) {
+            const cellDiv = createCell(blank);
+            tapeContainer.appendChild(cellDiv);
+            view.cells.push(cellDiv);
+        }
+
+        if (view.current) view.current.classList.remove('current');
+        view.current = view.cells[pos + view.offset];
+        view.current.classList.add('current');
+
+        // Auto Scroll agar sel aktif (Head) selalu di tengah container
+        view.current.scrollIntoView({ behavior: 'auto', inline: 'center', block: 'nearest' });
+    }
+
+    // Terapkan satu langkah [state_baru, posisi, simbol_tulis, gerak]: O(1) per langkah
+    function applyDelta(view, delta) {
+        const [newState, pos, writeId, move] = delta;
+        const states = view.trace.states;
+        const cellDiv = view.cells[pos + view.offset];
+        const readSymbol = cellDiv.dataset.symbol;
+        const writeSymbol = view.trace.symbols[writeId];
+        const moveName = move < 0 ? 'L' : (move > 0 ? 'R' : 'S');
+
+        appendLog(formatStepHeader(view.step, states[view.state]) +
+                  `   ACTION : Read '${readSymbol}' -> Write '${writeSymbol}' -> Move ${moveName} -> To ${states[newState]}\n` +
+                  '-'.repeat(40));
+
+        setCellSymbol(cellDiv, writeSymbol);
+        view.state = newState;
+        view.step++;
+        moveHead(view, pos + move);
+    }
+
+    // Animasi berbasis antrean: delta masuk sedikit demi sedikit dari stream,
+    // interval menerapkan satu langkah per tick.
+    function startAnimation() {
+        const anim = { view: null, queue: [], next: 0, result: null };
+
         // Reset Log UI
         logArea.textContent = "INITIALIZING VALIDATION PROTOCOLS...\n";
         
@@ -182,33 +246,92 @@ document.addEventListener('DOMContentLoaded', () => {
         const stepDelay = 100; 
 
         animationInterval = setInterval(() => {
-            // Cek apakah animasi selesai
-            if (step >= totalSteps) {
-                clearInterval(animationInterval);
-                finishAnimation(data);
+            if (!anim.view) return; // Header trace belum datang
+
+            // Antrean kosong: selesai jika hasil akhir sudah datang, atau tunggu data berikutnya
+            if (anim.next >= anim.queue.length) {
+                if (anim.result) {
+                    clearInterval(animationInterval);
+                    finishAnimation(anim.result);
+                }
                 return;
             }
 
-            const currentLog = logs[step];
-            
-            // 1. Update Terminal Log (tambah baris)
-            logArea.textContent += currentLog + "\n";
-            logArea.scrollTop = logArea.scrollHeight;
-
-            // 2. Update Animasi Pita (Parsing dari string log)
-            const tapeSnapshot = parseTapeFromLogLine(currentLog);
-            if (tapeSnapshot) {
-                renderTape(tapeSnapshot);
-            }
+            const delta = anim.queue[anim.next];
+            anim.queue[anim.next] = null; // Lepas referensi langkah yang sudah tampil
 
-            // 3. Mainkan Efek Suara
+            // Update log & pita (hanya sel yang berubah)
+            applyDelta(anim.view, delta);
+
+            // Mainkan Efek Suara
             playCyberSound();
 
-            step++;
+            anim.next++;
         }, stepDelay);
+
+        return anim;
+    }
+
+    // Parse satu frame Server-Sent Events ("event: ...\ndata: ...")
+    function parseSSEFrame(frame) {
+        let event = 'message';
+        let data = '';
+        frame.split('\n').forEach((line) => {
+            if (line.startsWith('event:')) event = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        return { event: event, data: data ? JSON.parse(data) : null };
+    }
+
+    // Jalankan simulasi lewat /run/stream: animasi mulai begitu langkah pertama tiba
+    async function streamSimulation(formData, signal) {
+        const response = await fetch('/run/stream', {
+            method: 'POST',
+            body: formData,
+            signal: signal
+        });
+
+        if (!response.ok) {
+            const data = await response.json();
+            throw new Error(data.error || `Server Error: ${response.status}`);
+        }
+
+        const anim = startAnimation();
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let sep;
+            while ((sep = buffer.indexOf('\n\n')) !== -1) {
+                const message = parseSSEFrame(buffer.slice(0, sep));
+                buffer = buffer.slice(sep + 2);
+
+                if (message.event === 'delta') {
+                    anim.queue.push(message.data);
+                } else if (message.event === 'init') {
+                    anim.view = createTapeView(message.data);
+                } else if (message.event === 'result') {
+                    anim.result = message.data;
+                } else if (message.event === 'error') {
+                    throw new Error(message.data.error);
+                }
+            }
+        }
+
+        if (!anim.result) {
+            throw new Error('Stream terputus sebelum hasil akhir diterima.');
+        }
     }
 
     function finishAnimation(data) {
+        // Baris log yang tidak punya delta (alasan HALT / pesan error) dari event result
+        (data.log || []).forEach((line) => appendLog(line));
+
         // Tampilkan Pita Hasil Akhir yang lengkap dari backend
         renderTape({ tape: data.tape, head_position: data.head_position });
 
@@ -250,8 +373,10 @@ document.addEventListener('DOMContentLoaded', () => {
         form.addEventListener('submit', async (e) => {
             e.preventDefault();
 
-            // Hentikan animasi lama jika ada
+            // Hentikan animasi & stream lama jika ada
             if (animationInterval) clearInterval(animationInterval);
+            if (streamController) streamController.abort();
+            streamController = new AbortController();
             
             // UI Loading State
             if (btnSubmit) {
@@ -266,23 +391,15 @@ document.addEventListener('DOMContentLoaded', () => {
 
             try {
                 const formData = new FormData(form);
+                // Trace ringkas: pita awal sekali, lalu satu delta per langkah
+                formData.append('trace_level', 'delta');
 
-                // Request ke Python Backend
-                const response = await fetch('/run', {
-                    method: 'POST',
-                    body: formData
-                });
-
-                const data = await response.json();
-
-                if (!response.ok) {
-                    throw new Error(data.error || `Server Error: ${response.status}`);
-                }
-                
-                // Jalankan Animasi
-                animateProcessing(data);
+                // Request ke Python Backend (streaming, animasi berjalan sambil data masuk)
+                await streamSimulation(formData, streamController.signal);
 
             } catch (error) {
+                if (error.name === 'AbortError') return; // Dibatalkan oleh submit baru / reset
+                if (animationInterval) clearInterval(animationInterval);
                 console.error('Error:', error);
                 logArea.textContent += `\n[CRITICAL FAILURE]: ${error.message}`;
                 resultMessage.textContent = 'SYSTEM FAILURE';
@@ -302,6 +419,7 @@ document.addEventListener('DOMContentLoaded', () => {
     if (resetButton) {
         resetButton.addEventListener('click', () => {
             if (animationInterval) clearInterval(animationInterval);
+            if (streamController) streamController.abort();
             passwordInput.value = '';
             logArea.textContent = 'WAITING FOR PROCESS...';
             tapeContainer.innerHTML = '<div class="tape-placeholder">SYSTEM STANDBY</div>';
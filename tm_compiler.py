@@ -0,0 +1,246 @@
+# tm_compiler.py
+# Kompilasi tabel transisi (dict bersarang berbasis string) menjadi tabel padat
+# berbasis integer, supaya setiap langkah mesin cukup satu lookup list.
+
+import threading
+from array import array
+from collections import OrderedDict
+
+# Kode pergerakan head. Arah selain 'L'/'R' diperlakukan sebagai Stay ('S').
+MOVE_DELTAS = {'L': -1, 'R': 1}
+
+
+def state_label(state):
+    """
+    Nama tampilan sebuah state. State boleh berupa string biasa atau tuple
+    komposit (nama, komponen...), misalnya ('q_sweep', 5, 'l-n-') -> 'q_sweep[5,l-n-]'.
+    """
+    if isinstance(state, tuple):
+        name, *parts = state
+        return f"{name}[{','.join(str(part) for part in parts)}]"
+    return state
+
+
+class CompiledRules:
+    """
+    Bentuk terkompilasi dari sebuah rules dict.
+
+    - State dan simbol dipetakan ke integer kecil (`state_ids`, `symbol_ids`).
+      State komposit (tuple) disimpan dengan nama tampilan dari state_label();
+      `state_ids` menerima tuple aslinya maupun nama tampilannya.
+    - Simbol Blank SELALU ber-id 0, sehingga pita bytearray yang baru dibuat
+      (berisi nol) otomatis berisi Blank.
+    - `table[state_id * n_symbols + symbol_id]` berisi tuple
+      `(next_state_id, write_symbol_id, delta, direction)` atau `None`
+      jika tidak ada transisi (REJECT implicit).
+    """
+
+    def __init__(self, rules, start_state='q0', accept_state='q_accept',
+                 reject_state='q_reject', blank_symbol='B'):
+        self.rules = rules
+        self.blank_symbol = blank_symbol
+
+        # 1. Kumpulkan nama state (urutan stabil: start, accept, reject, lalu sesuai rules)
+        state_names = []
+        state_ids = {}
+
+        def state_id(name):
+            if name not in state_ids:
+                label = state_label(name)
+                state_ids[name] = state_ids[label] = len(state_names)
+                state_names.append(label)
+            return state_ids[name]
+
+        # 2. Kumpulkan simbol pita (Blank = id 0)
+        symbol_names = []
+        symbol_ids = {}
+
+        def symbol_id(symbol):
+            if symbol not in symbol_ids:
+                symbol_ids[symbol] = len(symbol_names)
+                symbol_names.append(symbol)
+            return symbol_ids[symbol]
+
+        for name in (start_state, accept_state, reject_state):
+            state_id(name)
+        symbol_id(blank_symbol)
+
+        for state, state_rules in rules.items():
+            state_id(state)
+            for symbol, (new_state, write_symbol, _direction) in state_rules.items():
+                symbol_id(symbol)
+                symbol_id(write_symbol)
+                state_id(new_state)
+
+        n_symbols = len(symbol_names)
+
+        # 3. Bangun tabel padat state x simbol
+        table = [None] * (len(state_names) * n_symbols)
+        for state, state_rules in rules.items():
+            base = state_ids[state] * n_symbols
+            for symbol, (new_state, write_symbol, direction) in state_rules.items():
+                table[base + symbol_ids[symbol]] = (
+                    state_ids[new_state],
+                    symbol_ids[write_symbol],
+                    MOVE_DELTAS.get(direction, 0),
+                    direction,
+                )
+
+        halting = [False] * len(state_names)
+        halting[state_ids[accept_state]] = True
+        halting[state_ids[reject_state]] = True
+
+        self.state_names = state_names
+        self.state_ids = state_ids
+        self.symbol_names = symbol_names
+        self.symbol_ids = symbol_ids
+        self.n_symbols = n_symbols
+        self.table = table
+        self.halting = halting
+        self.start_id = state_ids[start_state]
+        self.accept_id = state_ids[accept_state]
+        self.reject_id = state_ids[reject_state]
+        self.scans = self._find_scans()
+
+    def _find_scans(self):
+        """
+        Cari "scan loop" per state: transisi ke state yang sama, tanpa menulis
+        (simbol tulis == simbol baca), dan head bergerak ke satu arah.
+        Return list per state: None atau (delta, stop_mask), dengan stop_mask
+        berupa bytes 256 (0 = simbol ikut di-scan, 1 = berhenti).
+        Hanya berlaku jika id simbol muat 1 byte (pita bytearray).
+        """
+        n_symbols = self.n_symbols
+        scans = [None] * len(self.state_names)
+        if n_symbols > 256:
+            return scans
+
+        for state in range(len(self.state_names)):
+            if self.halting[state]:
+                continue
+            by_delta = {-1: [], 1: []}
+            base = state * n_symbols
+            for symbol in range(n_symbols):
+                entry = self.table[base + symbol]
+                if entry and entry[0] == state and entry[1] == symbol and entry[2]:
+                    by_delta[entry[2]].append(symbol)
+            # Jika ada self-loop ke dua arah, ambil arah dengan simbol terbanyak;
+            # simbol arah lainnya tetap dieksekusi langkah-per-langkah.
+            delta = max(by_delta, key=lambda d: len(by_delta[d]))
+            if by_delta[delta]:
+                stop_mask = bytearray(b'\x01' * 256)
+                for symbol in by_delta[delta]:
+                    stop_mask[symbol] = 0
+                scans[state] = (delta, bytes(stop_mask))
+        return scans
+
+    def encode_input(self, input_string):
+        """
+        Ubah input string menjadi list id simbol.
+        Karakter yang tidak dikenal rules diberi id baru (>= n_symbols) khusus
+        untuk run ini, sehingga tetap bisa ditampilkan di pita tetapi tidak
+        punya transisi. Return: (ids, symbol_names_untuk_run_ini).
+        """
+        symbol_ids = self.symbol_ids
+        ids = [symbol_ids.get(c, -1) for c in input_string]
+        if -1 not in ids:
+            return ids, self.symbol_names
+
+        names = list(self.symbol_names)
+        extra = {}
+        for i, c in enumerate(input_string):
+            if ids[i] == -1:
+                if c not in extra:
+                    extra[c] = len(names)
+                    names.append(c)
+                ids[i] = extra[c]
+        return ids, names
+
+
+def scan_length(cells, pos, delta, limit, stop_mask):
+    """
+    Hitung berapa sel berturut-turut mulai dari `pos` (ke arah `delta`) yang
+    simbolnya TIDAK berhenti menurut stop_mask, tanpa melewati `limit`
+    (batas pita: hi untuk arah kanan, lo - 1 untuk arah kiri).
+    Pencarian dilakukan per potongan (ukuran berlipat) dengan bytes.translate,
+    sehingga biayanya sebanding dengan panjang scan, bukan panjang pita.
+    """
+    count = 0
+    chunk = 64
+    while pos != limit:
+        if delta > 0:
+            end = min(limit, pos + chunk)
+            found = cells[pos:end].translate(stop_mask).find(1)
+            if found >= 0:
+                return count + found
+            count += end - pos
+            pos = end
+        else:
+            start = max(limit + 1, pos - chunk + 1)
+            found = cells[start:pos + 1].translate(stop_mask).rfind(1)
+            if found >= 0:
+                return count + (pos - start - found)
+            count += pos - start + 1
+            pos = start - 1
+        chunk *= 2
+    return count
+
+
+def new_cells(n_cells, n_symbols):
+    """Buat buffer pita berisi Blank (id 0): bytearray jika muat 1 byte per sel."""
+    if n_symbols <= 256:
+        return bytearray(n_cells)
+    return array('I', bytes(4 * n_cells))
+
+
+def cells_from_ids(ids, n_symbols):
+    """Buat buffer pita dari list id simbol (tipe buffer sama dengan new_cells)."""
+    if n_symbols <= 256:
+        return bytearray(ids)
+    return array('I', ids)
+
+
+# Cache kecil (LRU) hasil kompilasi rules dict yang sering dipakai ulang, misalnya
+# TuringMachine(password, password_rules_dict). Setiap entri menyimpan salinan isi
+# rules; jika dict diubah setelah dikompilasi, salinan tidak lagi sama dan rules
+# dikompilasi ulang.
+COMPILE_CACHE_SIZE = 32
+_compiled_cache = OrderedDict()
+_compiled_cache_lock = threading.Lock()
+
+
+def _snapshot(rules):
+    """Salinan isi rules untuk mendeteksi perubahan (transisi list ikut disalin)."""
+    return {
+        state: {symbol: list(entry) if isinstance(entry, list) else entry
+                for symbol, entry in state_rules.items()}
+        for state, state_rules in rules.items()
+    }
+
+
+def compile_rules(rules, start_state='q0', accept_state='q_accept',
+                  reject_state='q_reject', blank_symbol='B'):
+    """
+    Kompilasi rules dict menjadi CompiledRules. Jika `rules` sudah berupa
+    CompiledRules, langsung dikembalikan (jalur tercepat, misalnya
+    password_rules.password_rules_compiled atau rule_registry).
+    Rules dict di-cache (LRU, COMPILE_CACHE_SIZE entri) selama isinya tidak berubah.
+    """
+    if isinstance(rules, CompiledRules):
+        return rules
+
+    key = (id(rules), start_state, accept_state, reject_state, blank_symbol)
+    with _compiled_cache_lock:
+        cached = _compiled_cache.get(key)
+        # Objek yang sama (id() bisa dipakai ulang objek lain) dan isi belum diubah
+        if cached is not None and cached[0] is rules and cached[1] == rules:
+            _compiled_cache.move_to_end(key)
+            return cached[2]
+
+    compiled = CompiledRules(rules, start_state, accept_state, reject_state, blank_symbol)
+    with _compiled_cache_lock:
+        _compiled_cache[key] = (rules, _snapshot(rules), compiled)
+        _compiled_cache.move_to_end(key)
+        while len(_compiled_cache) > COMPILE_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+    return compiled
@@ -0,0 +1,468 @@
+# tm_dfa.py
+# Menurunkan rule set "sweep" (hitung panjang lalu cari kelas karakter satu per
+# satu, seperti password_rules.py) menjadi DFA satu kali jalan, plus evaluator
+# massal berbasis NumPy untuk memvalidasi jutaan password sekaligus.
+#
+# Mesin seperti ini tidak butuh pita tak terbatas: marker l/u/n/s hanya
+# mencatat kelas mana yang sudah ditemukan. Jadi state DFA cukup berupa
+# (penghitung panjang, himpunan kelas yang sudah ditemukan), ditambah sedikit
+# informasi agar perilaku Blank di tengah input tetap sama persis (lihat SweepDFA).
+
+import random
+import sys
+
+from tm_compiler import compile_rules
+
+# Kelas karakter input untuk DFA
+CLASS_OTHER = 0   # Bukan simbol pita yang dikenal -> REJECT jika sampai terbaca
+CLASS_END = 1     # Blank / akhir input
+CLASS_PLAIN = 2   # Bagian alfabet, tapi bukan target kelas mana pun
+CLASS_MARKER = 3  # Marker yang bukan bagian alfabet input
+# Kelas target ke-i memakai id CLASS_FIRST_TARGET + i
+CLASS_FIRST_TARGET = 4
+
+# Batas matriks final_states_bulk(): password lebih panjang dievaluasi satu per
+# satu, dan satu matriks (baris x lebar) paling banyak sekian sel.
+BULK_MAX_WIDTH = 256
+BULK_MAX_CELLS = 1 << 22
+
+_ACCEPT = 'ACCEPT'
+_REJECT = 'REJECT'
+
+
+def _reject(state_name):
+    """Target REJECT, dicatat bersama state mesin Turing tempat penolakan terjadi."""
+    return (_REJECT, state_name)
+
+
+class SweepDFA:
+    """
+    DFA yang ekuivalen dengan sweep machine: panjang >= min_length, semua
+    karakter ada di `alphabet`, dan setidaknya satu karakter dari setiap
+    himpunan di `classes` (dicari berurutan, satu fase per kelas).
+
+    Pita dibaca per segmen yang dipisahkan simbol Blank. Segmen pertama
+    divalidasi penuh (panjang & alfabet). Sama seperti TuringMachine: jika
+    target pertama sebuah fase (bukan fase terakhir) adalah karakter terakhir
+    segmen, rewind berikutnya langsung menemukan Blank di kanannya, sehingga
+    fase berikutnya berjalan di segmen setelahnya.
+
+    State dibangun dari state abstrak yang dapat dicapai:
+        ('seg0', count, found, last)  - segmen pertama
+        ('seg', phase, found, last)   - segmen berikutnya, mulai dari fase `phase`
+    dengan `found` = bitmask kelas yang sudah ditemukan dan `last` = kelas yang
+    kemunculan pertamanya adalah karakter terakhir yang dibaca (atau -1).
+    State mulai accept_id bersifat absorbing: accept_id, lalu satu state REJECT
+    per alasan (reject_id = yang pertama). `halted_from[id]` berisi nama state
+    mesin Turing tempat mesin berhenti, sama dengan TuringMachine.halted_from.
+
+    `labels` adalah nama pendek per kelas (misal marker-nya: l/u/n/s), dipakai
+    untuk nama state yang mudah dibaca di to_rules(). `machine_states` (dari
+    compile_dfa) berisi nama state mesin asli: 'count' (list), 'scan',
+    'rewind' dan 'find' (list per kelas).
+    """
+
+    def __init__(self, min_length, classes, alphabet, markers=(), blank_symbol='B', labels=None,
+                 machine_states=None):
+        self.min_length = min_length
+        self.classes = [frozenset(c) for c in classes]
+        self.alphabet = frozenset(alphabet)
+        self.markers = frozenset(markers)
+        self.blank_symbol = blank_symbol
+        self.labels = list(labels) if labels else [str(i) for i in range(len(self.classes))]
+        self.n_classes = CLASS_FIRST_TARGET + len(self.classes)
+        k = len(self.classes)
+        self.machine_states = machine_states or {
+            'count': [f"count{i}" for i in range(min_length)],
+            'scan': "scan",
+            'rewind': [f"rewind{i}" for i in range(k)],
+            'find': [f"find{i}" for i in range(k)],
+        }
+
+        # Kelas per karakter
+        self.char_class = {c: CLASS_MARKER for c in self.markers - self.alphabet}
+        self.char_class.update({c: CLASS_PLAIN for c in self.alphabet})
+        for i, chars in enumerate(self.classes):
+            for c in chars:
+                self.char_class[c] = CLASS_FIRST_TARGET + i
+        self.char_class[blank_symbol] = CLASS_END
+
+        # Enumerasi state abstrak yang dapat dicapai (BFS) -> tabel integer
+        initial = ('seg0', 0, 0, -1)
+        order = [initial]
+        index = {initial: 0}
+        edges = []
+        while len(edges) < len(order):
+            state = order[len(edges)]
+            row = []
+            for cls in range(self.n_classes):
+                target = self._step(state, cls)
+                if target != _ACCEPT and target[0] != _REJECT and target not in index:
+                    index[target] = len(order)
+                    order.append(target)
+                row.append(target)
+            edges.append(row)
+
+        self.states = order
+        self.accept_id = len(order)
+        rejects = sorted({t for row in edges for t in row if t != _ACCEPT and t[0] == _REJECT})
+        self.reject_id = self.accept_id + 1
+        self.n_states = self.reject_id + len(rejects)
+        ids = {_ACCEPT: self.accept_id, **index}
+        ids.update({target: self.reject_id + i for i, target in enumerate(rejects)})
+        self.table = [[ids[t] for t in row] for row in edges]
+        self.table.append([self.accept_id] * self.n_classes)
+        self.table.extend([ids[t]] * self.n_classes for t in rejects)
+
+        finals = self.machine_states['find'][-1:] or [self.machine_states['scan']]
+        self.halted_from = {self.accept_id: finals[0]}
+        self.halted_from.update({ids[t]: t[1] for t in rejects})
+
+    def _step(self, state, cls):
+        """Transisi state abstrak untuk satu kelas karakter."""
+        k = len(self.classes)
+        kind, counter, found, last = state
+        target = cls - CLASS_FIRST_TARGET if cls >= CLASS_FIRST_TARGET else -1
+
+        names = self.machine_states
+        if kind == 'seg0':
+            # Fase hitung panjang & scan membaca seluruh segmen pertama
+            reader = names['count'][counter] if counter < self.min_length else names['scan']
+            if cls == CLASS_END:
+                return self._segment_end(0, found, last) if counter >= self.min_length else _reject(reader)
+            if cls in (CLASS_OTHER, CLASS_MARKER):
+                return _reject(reader)
+            count = min(counter + 1, self.min_length)
+            if target >= 0 and not found & (1 << target):
+                return ('seg0', count, found | (1 << target), target)
+            return ('seg0', count, found, -1)
+
+        # Segmen lanjutan: hanya kelas mulai fase `counter` yang masih dicari
+        phase = counter
+        if cls == CLASS_END:
+            return self._segment_end(phase, found, last)
+        missing = [i for i in range(phase, k) if not found & (1 << i)]
+        if cls == CLASS_OTHER:
+            # Fase yang belum menemukan targetnya akan menyapu sampai karakter ini...
+            if missing and (last < 0 or missing[0] < last):
+                return _reject(names['find'][missing[0]])
+            # ...atau rewind setelah target (selain fase terakhir) langsung membacanya
+            if 0 <= last < k - 1:
+                return _reject(names['rewind'][last + 1])
+        if not missing:
+            return _ACCEPT # Semua fase selesai sebelum akhir segmen
+        if target >= phase and not found & (1 << target):
+            return ('seg', phase, found | (1 << target), target)
+        return ('seg', phase, found, -1)
+
+    def _segment_end(self, phase, found, last):
+        """Jalankan fase-fase tersisa saat Blank (akhir segmen) terbaca."""
+        for i in range(phase, len(self.classes)):
+            if not found & (1 << i):
+                return _reject(self.machine_states['find'][i])
+            if last == i:
+                if i == len(self.classes) - 1:
+                    return _ACCEPT
+                return ('seg', i + 1, 0, -1)
+        return _ACCEPT
+
+    def state_name(self, state_id):
+        """
+        Nama state komposit (tuple) yang mudah dibaca, misal ('q_sweep', 5, 'l-n-', 'n'):
+        5 karakter terbaca, kelas l & n sudah ditemukan, karakter terakhir adalah
+        'n' pertama. Setelah Blank di tengah input: ('q_next', fase, ...).
+        """
+        kind, counter, found, last = self.states[state_id]
+        flags = ''.join(label if found & (1 << i) else '-' for i, label in enumerate(self.labels))
+        if kind == 'seg0':
+            name = ('q_sweep', counter, flags)
+        else:
+            name = ('q_next', self.labels[counter], flags)
+        return name + (self.labels[last],) if last >= 0 else name
+
+    @property
+    def start_state(self):
+        return self.state_name(0)
+
+    def to_rules(self, accept_state='q_accept', reject_state='q_reject'):
+        """
+        Ubah DFA menjadi rules TuringMachine satu kali sapuan kiri-ke-kanan
+        (tidak menulis apa pun, selalu bergerak R) dengan state komposit tuple.
+        Mulai dari self.start_state. State yang semua transisinya menuju accept
+        langsung diganti q_accept, karena mesin asli sudah berhenti sebelum
+        membaca karakter berikutnya (yang bisa saja bukan simbol pita).
+        """
+        blank = self.blank_symbol
+        symbols = sorted(self.alphabet | self.markers) + [blank]
+        accept_id = self.accept_id
+
+        def target(state):
+            if state > accept_id:
+                return reject_state
+            if state == accept_id or all(t == accept_id for t in self.table[state]):
+                return accept_state
+            return self.state_name(state)
+
+        rules = {}
+        for state in range(len(self.states)):
+            if target(state) == accept_state:
+                continue
+            row = self.table[state]
+            state_rules = {}
+            for symbol in symbols:
+                next_state = target(row[self.char_class[symbol]])
+                # Berhenti di tempat (S) saat menolak, seperti rules aslinya
+                direction = 'S' if next_state == reject_state else 'R'
+                state_rules[symbol] = [next_state, symbol, direction]
+            rules[self.state_name(state)] = state_rules
+        return rules
+
+    def final_state(self, input_string):
+        """Id state absorbing (accept_id atau salah satu state REJECT) untuk satu string."""
+        table = self.table
+        char_class = self.char_class
+        state = 0
+        for c in input_string:
+            state = table[state][char_class.get(c, CLASS_OTHER)]
+            if state >= self.accept_id:
+                return state
+        # Setelah input habis, pita berisi Blank tanpa batas
+        while state < self.accept_id:
+            state = table[state][CLASS_END]
+        return state
+
+    def accepts(self, input_string):
+        """Evaluasi satu string (Python murni)."""
+        return self.final_state(input_string) == self.accept_id
+
+    def classify(self, input_string):
+        """Return (diterima, nama state mesin Turing tempat mesin berhenti)."""
+        state = self.final_state(input_string)
+        return state == self.accept_id, self.halted_from[state]
+
+    def accepts_bulk(self, passwords, chunk_size=65536):
+        """
+        Evaluasi banyak password sekaligus dengan NumPy (butuh paket numpy).
+        Return: array bool, True = DITERIMA, urutan sama dengan input.
+        """
+        return self.final_states_bulk(passwords, chunk_size) == self.accept_id
+
+    def final_states_bulk(self, passwords, chunk_size=65536):
+        """
+        Seperti final_state() untuk banyak password sekaligus (NumPy); return
+        array id state absorbing, bisa dipetakan lewat halted_from.
+
+        Password dikelompokkan per lebar (panjang dibulatkan ke pangkat dua)
+        supaya padding matriks paling banyak 2x, dan setiap matriks dibatasi
+        BULK_MAX_CELLS sel. Password lebih panjang dari BULK_MAX_WIDTH byte
+        dievaluasi satu per satu dengan final_state(), sehingga satu baris
+        sampah yang sangat panjang tidak memperbesar matriks seluruh chunk.
+        Di dalam matriks, setiap kolom karakter hanya satu lookup tabel vektor.
+        """
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise RuntimeError("accepts_bulk() membutuhkan numpy (pip install numpy).") from e
+
+        # Lookup byte -> kelas. Hanya valid jika alfabet ASCII (1 byte per karakter);
+        # byte >= 128 (karakter non-ASCII) otomatis CLASS_OTHER.
+        if any(len(c.encode('utf-8')) != 1 for c in self.char_class):
+            raise ValueError("accepts_bulk() hanya mendukung alfabet ASCII; gunakan accepts().")
+        byte_class = np.full(256, CLASS_OTHER, dtype=np.uint8)
+        for c, cls in self.char_class.items():
+            byte_class[ord(c)] = cls
+
+        table = np.array(self.table, dtype=np.int32)
+        encoded = [p.encode('utf-8') if isinstance(p, str) else bytes(p) for p in passwords]
+        result = np.empty(len(encoded), dtype=np.int32)
+
+        groups = {}
+        for i, data in enumerate(encoded):
+            if len(data) > BULK_MAX_WIDTH:
+                # Byte non-ASCII tetap CLASS_OTHER setelah decode (karakter non-ASCII / U+FFFD)
+                result[i] = self.final_state(data.decode('utf-8', 'replace'))
+            else:
+                groups.setdefault(max(8, 1 << (len(data) - 1).bit_length()), []).append(i)
+
+        for width, indices in groups.items():
+            rows = max(1, min(chunk_size, BULK_MAX_CELLS // width))
+            for start in range(0, len(indices), rows):
+                batch = indices[start:start + rows]
+                chunk = [encoded[i] for i in batch]
+                lengths = np.fromiter((len(p) for p in chunk), dtype=np.int64, count=len(chunk))
+                max_len = int(lengths.max())
+
+                state = np.zeros(len(chunk), dtype=np.int32)
+                if max_len:
+                    # Matriks byte (n x max_len); sel padding dijadikan CLASS_END
+                    matrix = np.array(chunk, dtype=f'S{max_len}').view(np.uint8).reshape(len(chunk), max_len)
+                    classes = byte_class[matrix]
+                    classes[np.arange(max_len) >= lengths[:, None]] = CLASS_END
+                    del matrix
+                    for column in range(max_len):
+                        state = table[state, classes[:, column]]
+                        if (state >= self.accept_id).all():
+                            break
+                # Setelah input habis: Blank (dua kali cukup untuk mencapai state absorbing)
+                state = table[table[state, CLASS_END], CLASS_END]
+                result[batch] = state
+
+        return result
+
+
+def compile_dfa(rules):
+    """
+    Deteksi apakah rules berbentuk "sweep machine" lalu turunkan ke SweepDFA:
+      1. rantai state penghitung (setiap simbol alfabet -> state berikut, R, tanpa tulis;
+         Blank -> reject),
+      2. satu state scan ke kanan sampai Blank,
+      3. beberapa fase "rewind (L sampai Blank) lalu find (R sampai ketemu target,
+         tulis marker)", fase terakhir menuju accept.
+    Raise ValueError jika rules tidak memenuhi pola ini.
+    """
+    compiled = compile_rules(rules)
+    names = compiled.symbol_names
+    n_symbols = compiled.n_symbols
+    table = compiled.table
+    blank = 0
+
+    def row(state):
+        base = state * n_symbols
+        return {sym: table[base + sym] for sym in range(n_symbols) if table[base + sym]}
+
+    def fail(message):
+        raise ValueError(f"Rules bukan sweep machine: {message}")
+
+    def is_loop(state, entry, sym, delta):
+        return entry[0] == state and entry[1] == sym and entry[2] == delta
+
+    # 1. Rantai penghitung panjang
+    state = compiled.start_id
+    min_length = 0
+    alphabet = None
+    machine_states = {'count': [], 'rewind': [], 'find': []}
+    while True:
+        entries = row(state)
+        moves = {sym: e for sym, e in entries.items() if sym != blank}
+        targets = {e[0] for e in moves.values()}
+        if len(targets) != 1 or state in targets:
+            break
+        if not all(e[1] == sym and e[2] == 1 for sym, e in moves.items()):
+            fail(f"state penghitung '{compiled.state_names[state]}' menulis atau tidak bergerak ke kanan")
+        if entries.get(blank, (compiled.reject_id,))[0] != compiled.reject_id:
+            fail(f"state penghitung '{compiled.state_names[state]}' tidak menolak Blank")
+        if alphabet is not None and set(moves) != alphabet:
+            fail("alfabet state penghitung tidak seragam")
+        alphabet = set(moves)
+        min_length += 1
+        machine_states['count'].append(compiled.state_names[state])
+        state = targets.pop()
+
+    # 2. State scan sampai ujung kanan
+    entries = row(state)
+    scan = {sym for sym, e in entries.items() if sym != blank and is_loop(state, e, sym, 1)}
+    if alphabet is None:
+        alphabet = scan
+    if scan != alphabet or len(entries) != len(scan) + 1 or blank not in entries or entries[blank][2] != -1:
+        fail(f"state '{compiled.state_names[state]}' bukan scan kanan sampai Blank")
+    machine_states['scan'] = compiled.state_names[state]
+    state = entries[blank][0]
+
+    # 3. Fase rewind + find
+    classes = []
+    markers = set()
+    marker_names = []
+    while state != compiled.accept_id:
+        # Rewind: kiri sampai Blank, lalu kanan ke state find
+        entries = row(state)
+        rewind = {sym for sym, e in entries.items() if sym != blank and is_loop(state, e, sym, -1)}
+        if (not (alphabet | markers) <= rewind or blank not in entries
+                or entries[blank][1] != blank or entries[blank][2] != 1):
+            fail(f"state '{compiled.state_names[state]}' bukan rewind ke kiri sampai Blank")
+        find_state = entries[blank][0]
+
+        # Find: kanan, lompati non-target, tulis marker di target pertama
+        entries = row(find_state)
+        skips = {sym for sym, e in entries.items() if sym != blank and is_loop(find_state, e, sym, 1)}
+        hits = {sym: e for sym, e in entries.items() if sym != blank and sym not in skips}
+        if entries.get(blank, (None,))[0] != compiled.reject_id:
+            fail(f"state find '{compiled.state_names[find_state]}' tidak menolak Blank")
+        if not hits or len({(e[0], e[1], e[2]) for e in hits.values()}) != 1:
+            fail(f"target state find '{compiled.state_names[find_state]}' tidak seragam")
+        next_state, marker, delta, _direction = next(iter(hits.values()))
+        target = set(hits)
+        if delta != 1 or not target <= alphabet or not (alphabet | markers) - target <= skips:
+            fail(f"state find '{compiled.state_names[find_state]}' tidak lengkap")
+        # Marker fase sebelumnya tidak boleh menjadi target (marker mengubah isi pita)
+        if target & markers or any(target & c for c in classes):
+            fail("kelas target saling tumpang tindih atau mengenai marker")
+
+        classes.append(target)
+        markers.add(marker)
+        marker_names.append(names[marker])
+        machine_states['rewind'].append(compiled.state_names[state])
+        machine_states['find'].append(compiled.state_names[find_state])
+        state = next_state
+
+    return SweepDFA(
+        min_length,
+        [{names[s] for s in target} for target in classes],
+        {names[s] for s in alphabet},
+        {names[s] for s in markers},
+        compiled.blank_symbol,
+        labels=marker_names,
+        machine_states=machine_states,
+    )
+
+
+def check_equivalence(rules, samples=5000, max_length=40, seed=0, extra_chars=' é\x00'):
+    """
+    Harness ekuivalensi: bandingkan DFA hasil compile_dfa(rules) dengan
+    TuringMachine.run() (dan final_states_bulk jika numpy tersedia) pada input
+    acak, termasuk state tempat mesin berhenti (TuringMachine.halted_from).
+    Return list mismatch: (input, hasil_tm, (verdict, state) dfa, (verdict, state) bulk).
+    """
+    from turing_machine import TuringMachine
+    from tm_trace import TRACE_NONE
+
+    rules = compile_rules(rules) # Sekali saja, dipakai ulang oleh setiap TuringMachine
+    dfa = compile_dfa(rules)
+    rng = random.Random(seed)
+    pool = sorted(dfa.alphabet) + [dfa.blank_symbol] + list(extra_chars)
+    inputs = [''.join(rng.choice(pool) for _ in range(rng.randint(0, max_length)))
+              for _ in range(samples)]
+    # Input yang lolos: semua kelas ada dan panjang cukup (supaya kasus DITERIMA sering muncul)
+    for _ in range(samples // 4):
+        chars = [rng.choice(sorted(c)) for c in dfa.classes]
+        chars += [rng.choice(sorted(dfa.alphabet)) for _ in range(rng.randint(0, max_length))]
+        rng.shuffle(chars)
+        inputs.append(''.join(chars))
+
+    try:
+        bulk = [(int(state) == dfa.accept_id, dfa.halted_from[int(state)])
+                for state in dfa.final_states_bulk(inputs)]
+    except (RuntimeError, ValueError):
+        bulk = [None] * len(inputs)
+
+    mismatches = []
+    for text, bulk_verdict in zip(inputs, bulk):
+        max_steps = 10 * (len(dfa.classes) + 2) * (len(text) + 2) ** 2
+        tm = TuringMachine(text, rules, trace_level=TRACE_NONE, max_steps=max_steps)
+        result = tm.run()
+        tm_verdict = (result["result"] == "DITERIMA", tm.halted_from)
+        dfa_verdict = dfa.classify(text)
+        if tm_verdict != dfa_verdict or bulk_verdict not in (None, dfa_verdict):
+            mismatches.append((text, f"{result['result']}@{tm.halted_from}", dfa_verdict, bulk_verdict))
+    return mismatches
+
+
+if __name__ == '__main__':
+    # python tm_dfa.py [jumlah_sampel]
+    from password_rules import password_rules_dict
+
+    n_samples = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    mismatches = check_equivalence(password_rules_dict, samples=n_samples)
+    for text, tm_result, dfa_verdict, bulk_verdict in mismatches[:20]:
+        print(f"MISMATCH {text!r}: TM={tm_result} DFA={dfa_verdict} BULK={bulk_verdict}")
+    print(f"{len(mismatches)} mismatch dari {n_samples + n_samples // 4} input acak.")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,209 @@
+# tm_metrics.py
+# Instrumentasi opsional untuk TuringMachine (RunStats, per run) dan agregasi
+# metrik untuk endpoint /metrics dalam format teks Prometheus (MetricsRegistry).
+
+import threading
+from collections import Counter
+from time import perf_counter
+
+# Batas bucket histogram (detik) untuk latensi request & run
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Batas bucket histogram jumlah langkah per run
+STEP_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000)
+
+# Teks hasil TuringMachine -> label metrik
+RESULT_LABELS = {
+    "DITERIMA": "accepted",
+    "DITOLAK": "rejected",
+    "TIMEOUT (Loop?)": "timeout",
+    "TIMEOUT (Waktu habis)": "timeout",
+    "ERROR": "error",
+}
+
+
+class RunStats:
+    """
+    Penghitung untuk satu run TuringMachine(instrument=True):
+      - transition_hits[state_id * n_symbols + symbol_id]: berapa kali sel dengan
+        simbol itu dibaca di state itu (termasuk bacaan tanpa transisi -> HALT),
+      - unknown_reads: bacaan simbol di luar alfabet rules,
+      - tape_growth: berapa kali pita yang terlihat bertambah satu sel,
+        buffer_growth: berapa kali buffer pita dialokasikan ulang (_expand_tape),
+      - run_seconds / log_seconds: waktu total run() dan bagian yang dipakai mencatat trace.
+    """
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.n_symbols = compiled.n_symbols
+        self.transition_hits = [0] * (len(compiled.state_names) * compiled.n_symbols)
+        self.unknown_reads = 0
+        self.tape_growth = 0
+        self.buffer_growth = 0
+        self.steps = 0
+        self.final_state = None
+        self.run_seconds = 0.0
+        self.log_seconds = 0.0
+
+    def count_scan(self, state, cells):
+        """Catat satu macro-step scan: setiap sel di `cells` dibaca sekali di `state`."""
+        base = state * self.n_symbols
+        for symbol, count in Counter(cells).items():
+            self.transition_hits[base + symbol] += count
+
+    def timed(self, function):
+        """Bungkus fungsi pencatat trace supaya waktunya masuk log_seconds."""
+        def wrapper(*args):
+            start = perf_counter()
+            function(*args)
+            self.log_seconds += perf_counter() - start
+        return wrapper
+
+    @property
+    def step_seconds(self):
+        return max(0.0, self.run_seconds - self.log_seconds)
+
+    def state_visits(self):
+        """{nama_state: jumlah langkah di state itu}; state akhir dihitung sekali."""
+        names = self.compiled.state_names
+        n_symbols = self.n_symbols
+        visits = Counter()
+        for index, hits in enumerate(self.transition_hits):
+            if hits:
+                visits[names[index // n_symbols]] += hits
+        if self.final_state is not None and self.compiled.halting[self.final_state]:
+            visits[names[self.final_state]] += 1
+        return dict(visits)
+
+    def transition_counts(self):
+        """{(nama_state, simbol_dibaca): jumlah} untuk transisi yang pernah dipakai."""
+        names = self.compiled.state_names
+        symbols = self.compiled.symbol_names
+        n_symbols = self.n_symbols
+        return {
+            (names[index // n_symbols], symbols[index % n_symbols]): hits
+            for index, hits in enumerate(self.transition_hits) if hits
+        }
+
+    def to_dict(self):
+        return {
+            "steps": self.steps,
+            "state_visits": self.state_visits(),
+            "transition_hits": [[state, symbol, hits] for (state, symbol), hits
+                                in self.transition_counts().items()],
+            "unknown_reads": self.unknown_reads,
+            "tape_growth": self.tape_growth,
+            "buffer_growth": self.buffer_growth,
+            "run_seconds": self.run_seconds,
+            "step_seconds": self.step_seconds,
+            "log_seconds": self.log_seconds,
+        }
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class MetricsRegistry:
+    """Counter & histogram sederhana (thread-safe) yang dirender sebagai teks Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}   # nama -> {labels: nilai}
+        self._histograms = {} # nama -> {labels: Histogram}
+
+    def _counter(self, name, help_text, labels, value=1):
+        self._help.setdefault(name, ('counter', help_text))
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def _histogram(self, name, help_text, labels, value, buckets):
+        self._help.setdefault(name, ('histogram', help_text))
+        series = self._histograms.setdefault(name, {})
+        if labels not in series:
+            series[labels] = Histogram(buckets)
+        series[labels].observe(value)
+
+    def observe_request(self, endpoint, method, status, seconds):
+        labels = (('endpoint', endpoint), ('method', method))
+        with self._lock:
+            self._histogram('tm_request_duration_seconds', "Latensi request HTTP.",
+                            labels, seconds, LATENCY_BUCKETS)
+            self._counter('tm_requests_total', "Jumlah request HTTP.",
+                          labels + (('status', str(status)),))
+
+    def observe_result(self, rule_set, result_text):
+        result = RESULT_LABELS.get(result_text, "error")
+        with self._lock:
+            self._counter('tm_results_total', "Verdict per rule set (accepted, rejected, timeout, error).",
+                          (('rule_set', rule_set), ('result', result)))
+
+    def observe_run(self, rule_set, stats):
+        """Agregasi RunStats dari satu run yang diinstrumentasi."""
+        labels = (('rule_set', rule_set),)
+        with self._lock:
+            self._histogram('tm_run_steps', "Jumlah langkah per run.", labels, stats.steps, STEP_BUCKETS)
+            self._histogram('tm_run_duration_seconds', "Waktu run() per simulasi.",
+                            labels, stats.run_seconds, LATENCY_BUCKETS)
+            self._counter('tm_step_seconds_total', "Waktu eksekusi langkah (tanpa pencatatan trace).",
+                          labels, stats.step_seconds)
+            self._counter('tm_log_seconds_total', "Waktu mencatat trace.", labels, stats.log_seconds)
+            self._counter('tm_tape_growth_total', "Pertambahan sel pita yang terlihat.",
+                          labels, stats.tape_growth)
+            self._counter('tm_tape_buffer_growth_total', "Alokasi ulang buffer pita.",
+                          labels, stats.buffer_growth)
+            self._counter('tm_unknown_symbol_reads_total', "Bacaan simbol di luar alfabet rules.",
+                          labels, stats.unknown_reads)
+            for state, visits in stats.state_visits().items():
+                self._counter('tm_state_visits_total', "Kunjungan per state.",
+                              labels + (('state', state),), visits)
+            for (state, symbol), hits in stats.transition_counts().items():
+                self._counter('tm_transition_hits_total', "Pemakaian per transisi (state, simbol dibaca).",
+                              labels + (('state', state), ('symbol', symbol)), hits)
+
+    def observe_error(self, endpoint):
+        with self._lock:
+            self._counter('tm_errors_total', "Exception saat memproses request.", (('endpoint', endpoint),))
+
+    def render(self):
+        """Semua metrik dalam format teks Prometheus (text/plain; version=0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in sorted(self._help.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == 'counter':
+                    for labels, value in self._counters[name].items():
+                        lines.append(f"{name}{_labels(labels)} {value}")
+                    continue
+                for labels, histogram in self._histograms[name].items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,157 @@
+# tm_trace.py
+# Jejak eksekusi (trace) TuringMachine yang disimpan ringkas lalu diformat
+# menjadi teks hanya saat dibutuhkan (misalnya saat diserialisasi ke JSON).
+
+from collections import deque
+from collections.abc import Sequence
+
+# Level trace yang didukung TuringMachine
+TRACE_NONE = 'none'        # Hanya verdict, tanpa log
+TRACE_SUMMARY = 'summary'  # Satu baris ringkasan (jumlah langkah, state akhir, pita akhir)
+TRACE_FULL = 'full'        # Log lengkap per langkah (format sama seperti sebelumnya)
+TRACE_DELTA = 'delta'      # Trace ringkas untuk visualizer (lihat DeltaTrace)
+TRACE_LEVELS = (TRACE_NONE, TRACE_SUMMARY, TRACE_FULL, TRACE_DELTA)
+
+# Jumlah sel di kiri/kanan head yang ditampilkan di setiap baris log
+TAPE_WINDOW = 10
+
+
+def format_summary(steps, state, head, tape):
+    """Baris log untuk trace_level 'summary'."""
+    return f"SUMMARY | STEPS {steps} | STATE {state} | HEAD {head} | TAPE {tape}"
+
+
+class TraceLog(Sequence):
+    """
+    Daftar log langkah yang diformat secara lazy.
+
+    Setiap langkah disimpan sebagai tuple ringkas:
+        (step, state_id, head, window_start, tape_length, window_cells, action)
+    dengan `action` berupa:
+        - tuple instruksi dari tabel terkompilasi (transisi normal),
+        - None (tidak ada transisi -> HALT),
+        - str (teks aksi bebas, misal "INITIALIZING TAPE").
+    Baris yang sudah berupa teks (misal pesan error) disimpan apa adanya.
+
+    Jika `limit` diisi, hanya `limit` entri TERAKHIR yang disimpan (ring buffer).
+    """
+
+    def __init__(self, state_names, symbol_names, limit=None):
+        self.state_names = state_names
+        self.symbol_names = symbol_names
+        self.limit = limit
+        self.entries = deque(maxlen=limit) if limit else []
+        self._first = None
+
+    def record(self, entry):
+        if self._first is None:
+            self._first = entry
+        self.entries.append(entry)
+
+    def append(self, line):
+        """Tambahkan baris teks yang sudah jadi (kompatibel dengan list.append)."""
+        self.record(line)
+
+    @property
+    def truncated(self):
+        """True jika sebagian entri awal sudah terbuang karena `limit`."""
+        return bool(self.entries) and self.entries[0] is not self._first
+
+    def format_entry(self, entry):
+        if isinstance(entry, str):
+            return entry
+
+        step, state, head, start, length, window, action = entry
+        names = self.symbol_names
+        state_names = self.state_names
+
+        # Visualisasi pita (hanya area sekitar head)
+        segment = []
+        for i, cell in enumerate(window, start):
+            if i == head:
+                segment.append(f"[{names[cell]}]") # Tandai posisi head
+            else:
+                segment.append(f" {names[cell]} ")
+        tape_segment = "".join(segment)
+
+        if start > 0: tape_segment = "..." + tape_segment
+        if start + len(window) < length: tape_segment += "..."
+
+        if isinstance(action, str):
+            action_desc = action
+        else:
+            read_symbol = names[window[head - start]]
+            if action is None:
+                action_desc = f"No rule for ({state_names[state]}, '{read_symbol}'). HALT."
+            else:
+                new_state, write_symbol, _delta, direction = action
+                action_desc = (
+                    f"Read '{read_symbol}' -> Write '{names[write_symbol]}' "
+                    f"-> Move {direction} -> To {state_names[new_state]}"
+                )
+
+        return (
+            f"STEP {step:03} | {state_names[state]:<10} \n"
+            f"   ACTION : {action_desc}\n"
+            f"   TAPE   : {tape_segment}\n"
+            f"{'-'*40}"
+        )
+
+    def to_list(self):
+        """Format seluruh log menjadi list string (dipanggil saat serialisasi)."""
+        lines = [self.format_entry(entry) for entry in self.entries]
+        if self.truncated:
+            lines.insert(0, f"... [TRACE DIPOTONG: hanya {self.limit} entri terakhir yang disimpan]")
+        return lines
+
+    def __len__(self):
+        return len(self.entries) + (1 if self.truncated else 0)
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and not self.truncated:
+            return self.format_entry(self.entries[index])
+        return self.to_list()[index]
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __eq__(self, other):
+        if isinstance(other, (TraceLog, list)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TraceLog({len(self)} entries)"
+
+
+class DeltaTrace:
+    """
+    Trace ringkas (machine-readable) untuk visualizer.
+
+    Kamus state & simbol serta pita awal dikirim SEKALI (lihat header()),
+    lalu satu tuple per langkah yang dieksekusi:
+        (state_id_baru, posisi_head, simbol_tulis_id, gerak)
+    dengan `posisi_head` = sel yang ditulis (sebelum head bergerak), relatif
+    terhadap sel pertama pita awal (bisa negatif jika pita tumbuh ke kiri),
+    dan `gerak` berupa -1 (L), 0 (S), atau 1 (R).
+    Ukurannya O(jumlah langkah), tidak bergantung pada lebar jendela pita.
+    """
+
+    def __init__(self, state_names, symbol_names, start_state, initial_tape):
+        self.state_names = state_names
+        self.symbol_names = symbol_names
+        self.start_state = start_state
+        self.initial_tape = initial_tape
+        self.steps = []
+
+    def header(self):
+        return {
+            "format": TRACE_DELTA,
+            "states": self.state_names,
+            "symbols": self.symbol_names,
+            "start_state": self.start_state,
+            "tape": self.initial_tape,
+        }
+
+    def to_dict(self):
+        return {**self.header(), "steps": self.steps}
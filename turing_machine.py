@@ -1,29 +1,145 @@
+from time import perf_counter
+
+from tm_compiler import cells_from_ids, compile_rules, new_cells, scan_length
+from tm_metrics import RunStats
+from tm_trace import (
+    TAPE_WINDOW, TRACE_DELTA, TRACE_FULL, TRACE_LEVELS, TRACE_NONE, TRACE_SUMMARY, DeltaTrace, TraceLog,
+    format_summary,
+)
+
+# Padding awal (jumlah sel Blank) di kiri & kanan buffer pita
+TAPE_PADDING = 16
+
+# Safety break bawaan agar tidak infinite loop browser
+DEFAULT_MAX_STEPS = 1000
+
+# Jika time_budget diisi, jam dicek setiap sekian langkah (bukan setiap langkah)
+DEADLINE_CHECK_STEPS = 4096
+
+
 class TuringMachine:
-    def __init__(self, input_string, rules=None):
+    # Cache hasil kompilasi default rules (dibangun sekali saja)
+    _default_compiled = None
+
+    def __init__(self, input_string, rules=None, trace_level=TRACE_FULL, trace_limit=None,
+                 max_steps=DEFAULT_MAX_STEPS, accelerate=True, time_budget=None, instrument=False):
+        """
+        trace_level : 'none' | 'summary' | 'full' | 'delta' (lihat tm_trace.TRACE_LEVELS).
+                      'delta' menghasilkan tm_trace.DeltaTrace di result['trace'].
+        trace_limit : jika diisi, log 'full' hanya menyimpan N entri terakhir.
+        max_steps   : batas langkah sebelum hasil dianggap TIMEOUT.
+        accelerate  : jalankan scan loop (gerak satu arah tanpa menulis) sebagai
+                      satu macro-step. Jumlah langkah, state, pita, dan head tetap
+                      sama; hanya aktif jika trace_level bukan 'full'/'delta'.
+        time_budget : batas waktu (detik) untuk run(); jika habis, hasilnya
+                      "TIMEOUT (Waktu habis)".
+        instrument  : kumpulkan penghitung per state/transisi, pertumbuhan pita,
+                      dan waktu langkah vs pencatatan trace di self.stats
+                      (tm_metrics.RunStats). Jika False, self.stats = None.
+        """
+        if trace_level not in TRACE_LEVELS:
+            raise ValueError(f"trace_level harus salah satu dari {TRACE_LEVELS}, bukan {trace_level!r}")
+
         # 1. Setup Input dan Pita
         self.input_string = input_string if input_string else ""
         self.blank_symbol = 'B' # Simbol untuk sel kosong
-        
-        # Inisialisasi pita dengan input string
-        # Kita beri padding blank symbol di kiri dan kanan
-        self.tape = list(self.input_string) if self.input_string else [self.blank_symbol]
-        self.head = 0
+        self.accept_state = 'q_accept'
+        self.reject_state = 'q_reject'
         self.step_count = 0
-        self.trace_log = [] # Menyimpan jejak eksekusi untuk UI
+        self.trace_level = trace_level
+        self.max_steps = max_steps
+        self.accelerate = accelerate
+        self.time_budget = time_budget
 
         # 2. Setup Rules (Aturan Transisi)
         # Format: 'state_sekarang': {'simbol_baca': ('state_baru', 'tulis_simbol', 'arah')}
+        # Rules juga boleh berupa CompiledRules (hasil tm_compiler.compile_rules)
         if rules:
-            self.transitions = rules
+            self.compiled = compile_rules(rules)
         else:
             # DEFAULT RULES: Validasi Password Sederhana
-            # Logika: Scan pita, cari simbol '@'. 
+            # Logika: Scan pita, cari simbol '@'.
             # Jika ketemu '@' -> terima. Jika habis -> tolak.
-            self.transitions = self._get_default_rules()
+            if TuringMachine._default_compiled is None:
+                TuringMachine._default_compiled = compile_rules(self._get_default_rules())
+            self.compiled = TuringMachine._default_compiled
+        self.transitions = self.compiled.rules
 
-        self.current_state = 'q0'
-        self.accept_state = 'q_accept'
-        self.reject_state = 'q_reject'
+        # 3. Pita: buffer id simbol dengan offset, bisa tumbuh ke kiri & kanan
+        # tanpa menggeser isi (sel [_lo, _hi) adalah pita yang "terlihat").
+        ids, self._symbol_names = self.compiled.encode_input(self.input_string)
+        if not ids:
+            ids = [0] # Pita kosong = satu sel Blank
+        padding = [0] * TAPE_PADDING
+        self._cells = cells_from_ids(padding + ids + padding, len(self._symbol_names))
+        self._lo = TAPE_PADDING
+        self._hi = TAPE_PADDING + len(ids)
+        self._pos = self._lo
+        self._origin = self._lo # Index buffer untuk sel pertama pita awal
+
+        self._state = self.compiled.start_id
+        self._previous_state = None # State sebelum transisi terakhir (lihat halted_from)
+
+        # Menyimpan jejak eksekusi untuk UI (diformat lazy, lihat tm_trace.TraceLog)
+        self.trace_log = TraceLog(self.compiled.state_names, self._symbol_names, trace_limit)
+        # Instrumentasi opsional (None = mati; hot loop hanya mengecek None)
+        self.stats = RunStats(self.compiled) if instrument else None
+
+        # Tujuan entri log per langkah (None = tidak dicatat)
+        self._record = self.trace_log.record if trace_level == TRACE_FULL else None
+        if self._record is not None and self.stats is not None:
+            self._record = self.stats.timed(self._record)
+
+        # Trace delta untuk visualizer (pita awal + satu tuple per langkah)
+        self.delta_trace = None
+        if trace_level == TRACE_DELTA:
+            self.delta_trace = DeltaTrace(self.compiled.state_names, self._symbol_names,
+                                          self.compiled.start_id, ids)
+
+    # --- Tampilan "klasik" (list pita, index head, nama state) ---
+
+    @property
+    def tape(self):
+        return [self._symbol_names[c] for c in self._cells[self._lo:self._hi]]
+
+    @property
+    def head(self):
+        return self._pos - self._lo
+
+    @property
+    def halted_from(self):
+        """
+        Nama state tempat mesin berhenti (state terakhir sebelum masuk accept/reject),
+        misalnya 'q_find_upper' jika password ditolak karena tidak ada huruf besar.
+        None jika mesin belum berhenti.
+        """
+        if not self.compiled.halting[self._state] or self._previous_state is None:
+            return None
+        return self.compiled.state_names[self._previous_state]
+
+    @property
+    def halted_without_rule(self):
+        """True jika mesin berhenti (REJECT implicit) karena tidak ada transisi untuk simbol di head."""
+        compiled = self.compiled
+        previous = self._previous_state
+        if self._state != compiled.reject_id or previous is None:
+            return False
+        symbol = self._cells[self._pos]
+        # Masuk reject lewat transisi biasa -> bukan HALT implicit
+        return not (symbol < compiled.n_symbols and compiled.table[previous * compiled.n_symbols + symbol])
+
+    @property
+    def tape_origin(self):
+        """Index sel pertama input di dalam `tape` (> 0 jika pita tumbuh ke kiri)."""
+        return self._origin - self._lo
+
+    @property
+    def current_state(self):
+        return self.compiled.state_names[self._state]
+
+    @current_state.setter
+    def current_state(self, name):
+        self._state = self.compiled.state_ids[name]
 
     def _get_default_rules(self):
         """
@@ -37,7 +153,7 @@ class TuringMachine:
                 # Jika ketemu '@', pindah state ke q_found
                 '@': ('q_found', '@', 'R'),
                 # Jika ketemu Blank (akhir string) tanpa nemu @, tolak
-                'B': ('q_reject', 'B', 'S') 
+                'B': ('q_reject', 'B', 'S')
             },
             'q_found': {
                 # Setelah ketemu @, scan sisa string sampai akhir (Blank)
@@ -51,113 +167,297 @@ class TuringMachine:
     def _expand_tape(self):
         """
         Mencegah IndexError (Infinite Tape Logic).
-        Menambah 'B' jika head bergerak ke luar batas array.
+        Menambah 'B' jika head bergerak ke luar batas pita. Buffer diperbesar
+        (2x) hanya jika head keluar dari buffer, jadi tidak ada insert(0, ...).
         """
-        if self.head < 0:
-            self.tape.insert(0, self.blank_symbol)
-            self.head = 0 # Head kembali ke index 0 (elemen baru)
-        elif self.head >= len(self.tape):
-            self.tape.append(self.blank_symbol)
+        stats = self.stats
+        if self._pos < self._lo:
+            if self._pos < 0:
+                grow = len(self._cells)
+                self._cells = new_cells(grow, len(self._symbol_names)) + self._cells
+                self._pos += grow
+                self._lo += grow
+                self._hi += grow
+                self._origin += grow
+                if stats is not None:
+                    stats.buffer_growth += 1
+            if stats is not None:
+                stats.tape_growth += self._lo - self._pos
+            self._lo = self._pos
+        elif self._pos >= self._hi:
+            if self._pos >= len(self._cells):
+                self._cells.extend(new_cells(len(self._cells), len(self._symbol_names)))
+                if stats is not None:
+                    stats.buffer_growth += 1
+            if stats is not None:
+                stats.tape_growth += self._pos + 1 - self._hi
+            self._hi = self._pos + 1
 
     def _log_step(self, action_desc):
         """
-        Membuat format log yang rapi untuk tampilan 'Code Editor' di UI.
+        Mencatat satu baris log untuk tampilan 'Code Editor' di UI.
+        `action_desc` boleh berupa teks, tuple instruksi terkompilasi, atau None (HALT).
         """
-        # Buat visualisasi pita (hanya area sekitar head)
-        start = max(0, self.head - 10)
-        end = min(len(self.tape), self.head + 10)
-        tape_segment = ""
-        
-        for i in range(start, end):
-            val = self.tape[i]
-            if i == self.head:
-                tape_segment += f"[{val}]" # Tandai posisi head
-            else:
-                tape_segment += f" {val} "
-        
-        if start > 0: tape_segment = "..." + tape_segment
-        if end < len(self.tape): tape_segment += "..."
-
-        # Format string log
-        log_entry = (
-            f"STEP {self.step_count:03} | {self.current_state:<10} \n"
-            f"   ACTION : {action_desc}\n"
-            f"   TAPE   : {tape_segment}\n"
-            f"{'-'*40}"
-        )
-        self.trace_log.append(log_entry)
+        self._log_at(self.step_count, self._state, self._pos, action_desc)
+
+    def _log_at(self, step_count, state, pos, action):
+        """Seperti _log_step, tetapi step/state/posisi head diberikan eksplisit."""
+        if self._record is None:
+            return
+        self._record(self._entry_at(step_count, state, pos, action))
+
+    def _entry_at(self, step_count, state, pos, action):
+        """Entri TraceLog: simpan potongan pita di sekitar head saja; formatting ditunda."""
+        lo, hi = self._lo, self._hi
+        start = max(lo, pos - TAPE_WINDOW)
+        end = min(hi, pos + TAPE_WINDOW)
+        return (step_count, state, pos - lo, start - lo, hi - lo, self._cells[start:end], action)
+
+    def _halt_line(self):
+        """Baris log "No rule for (...). HALT." jika halted_without_rule, selain itu None."""
+        if not self.halted_without_rule:
+            return None
+        return self.trace_log.format_entry(self._entry_at(self.step_count, self._previous_state, self._pos, None))
 
     def step(self):
         """Eksekusi satu langkah"""
         self._expand_tape()
-        
+        compiled = self.compiled
+
         # Cek apakah sudah di state berhenti
-        if self.current_state in [self.accept_state, self.reject_state]:
+        if compiled.halting[self._state]:
             return False
 
-        # 1. Baca simbol
-        current_symbol = self.tape[self.head]
+        # 1. Baca simbol (id integer)
+        current_symbol = self._cells[self._pos]
 
-        # 2. Cari aturan transisi
-        # Ambil rule berdasarkan state sekarang
-        state_rules = self.transitions.get(self.current_state, {})
-        
-        # Cek apakah ada transisi untuk simbol ini
-        # Jika tidak ada spesifik, cek apakah ada wildcard (opsional logic)
-        instruction = state_rules.get(current_symbol)
+        # 2. Cari aturan transisi di tabel padat (state x simbol).
+        # Simbol di luar alfabet rules (id >= n_symbols) tidak punya transisi.
+        instruction = None
+        if current_symbol < compiled.n_symbols:
+            instruction = compiled.table[self._state * compiled.n_symbols + current_symbol]
+            if self.stats is not None:
+                self.stats.transition_hits[self._state * compiled.n_symbols + current_symbol] += 1
+        elif self.stats is not None:
+            self.stats.unknown_reads += 1
 
         if instruction:
-            new_state, write_symbol, direction = instruction
-            
+            new_state, write_symbol, delta, _direction = instruction
+
             # Log sebelum berubah
-            action_msg = f"Read '{current_symbol}' -> Write '{write_symbol}' -> Move {direction} -> To {new_state}"
-            self._log_step(action_msg)
+            self._log_step(instruction)
+            if self.delta_trace is not None:
+                self.delta_trace.steps.append((new_state, self._pos - self._origin, write_symbol, delta))
 
             # 3. Tulis simbol
-            self.tape[self.head] = write_symbol
+            self._cells[self._pos] = write_symbol
 
-            # 4. Pindah Head
-            if direction == 'R':
-                self.head += 1
-            elif direction == 'L':
-                self.head -= 1
-            # 'S' atau lainnya berarti diam (Stay)
+            # 4. Pindah Head ('S' atau lainnya berarti diam / delta 0)
+            self._pos += delta
 
             # 5. Update State
-            self.current_state = new_state
+            self._previous_state = self._state
+            self._state = new_state
             self.step_count += 1
+            if self.stats is not None:
+                self.stats.steps = self.step_count
+                self.stats.final_state = new_state
             return True
         else:
             # Tidak ada transisi yang didefinisikan -> REJECT implicit
-            self._log_step(f"No rule for ({self.current_state}, '{current_symbol}'). HALT.")
-            self.current_state = self.reject_state
+            self._log_step(None)
+            self._previous_state = self._state
+            self._state = compiled.reject_id
+            if self.stats is not None:
+                self.stats.final_state = self._state
             return False
 
     def run(self):
         """Jalankan simulasi sampai selesai atau limit tercapai"""
-        max_steps = 1000 # Safety break agar tidak infinite loop browser
-        
+        max_steps = self.max_steps
+        compiled = self.compiled
+        halting = compiled.halting
+        table = compiled.table
+        n_symbols = compiled.n_symbols
+        record = self._record
+        full_trace = record is not None
+        record_delta = self.delta_trace.steps.append if self.delta_trace is not None else None
+        stats = self.stats
+        hits = None
+        if stats is not None:
+            run_start = perf_counter()
+            hits = stats.transition_hits
+            if record_delta is not None:
+                record_delta = stats.timed(record_delta)
+        # Macro-step hanya bisa dipakai jika tidak perlu log per langkah
+        per_step = full_trace or record_delta is not None
+        use_scans = self.accelerate and not per_step and isinstance(self._cells, bytearray)
+        scans = compiled.scans if use_scans else None
+
         self._log_step("INITIALIZING TAPE")
 
-        while self.current_state not in [self.accept_state, self.reject_state] and self.step_count < max_steps:
-            running = self.step()
-            if not running:
+        # Loop utama memakai variabel lokal (logika sama dengan step()),
+        # atribut objek hanya disinkronkan saat pita perlu diperbesar.
+        cells, lo, hi, origin = self._cells, self._lo, self._hi, self._origin
+        pos, state, steps = self._pos, self._state, self.step_count
+        previous = self._previous_state
+
+        deadline = perf_counter() + self.time_budget if self.time_budget is not None else None
+        timed_out = False
+
+        # Loop dijalankan per potongan langkah agar jam cukup dicek sesekali
+        while True:
+            limit = max_steps if deadline is None else min(max_steps, steps + DEADLINE_CHECK_STEPS)
+
+            while not halting[state] and steps < limit:
+                if pos < lo or pos >= hi:
+                    self._pos = pos
+                    self._expand_tape()
+                    cells, lo, hi, pos, origin = self._cells, self._lo, self._hi, self._pos, self._origin
+
+                current_symbol = cells[pos]
+
+                if scans is not None:
+                    scan = scans[state]
+                    if scan is not None and not scan[1][current_symbol]:
+                        # Scan loop: lompati semua sel yang hanya "dilewati" sekaligus
+                        delta = scan[0]
+                        length = scan_length(cells, pos, delta, hi if delta > 0 else lo - 1, scan[1])
+                        length = min(length, limit - steps)
+                        if hits is not None:
+                            stats.count_scan(state, cells[pos:pos + length] if delta > 0
+                                             else cells[pos - length + 1:pos + 1])
+                        pos += delta * length
+                        steps += length
+                        continue
+
+                instruction = table[state * n_symbols + current_symbol] if current_symbol < n_symbols else None
+
+                if hits is not None:
+                    if current_symbol < n_symbols:
+                        hits[state * n_symbols + current_symbol] += 1
+                    else:
+                        stats.unknown_reads += 1
+
+                if full_trace:
+                    start = pos - TAPE_WINDOW if pos - TAPE_WINDOW > lo else lo
+                    end = pos + TAPE_WINDOW if pos + TAPE_WINDOW < hi else hi
+                    record((steps, state, pos - lo, start - lo, hi - lo, cells[start:end], instruction))
+
+                if not instruction:
+                    # Tidak ada transisi yang didefinisikan -> REJECT implicit
+                    previous = state
+                    state = compiled.reject_id
+                    break
+
+                if record_delta is not None:
+                    record_delta((instruction[0], pos - origin, instruction[1], instruction[2]))
+
+                cells[pos] = instruction[1]
+                pos += instruction[2]
+                previous = state
+                state = instruction[0]
+                steps += 1
+
+            if halting[state] or steps >= max_steps:
+                break
+            if perf_counter() > deadline:
+                timed_out = True
                 break
-        
+
+        self._pos, self._state, self.step_count = pos, state, steps
+        self._previous_state = previous
+        if stats is not None:
+            stats.steps = steps
+            stats.final_state = state
+            stats.run_seconds = perf_counter() - run_start
+
         # Tentukan hasil akhir teks
-        if self.current_state == self.accept_state:
-            result_text = "DITERIMA"
-        elif self.step_count >= max_steps:
-            result_text = "TIMEOUT (Loop?)"
-            self.trace_log.append("\n[ERROR] Batas langkah maksimum (1000) terlampaui.")
+        result_text, error_line = self._verdict(timed_out)
+        if error_line and self.trace_level != TRACE_NONE:
+            self.trace_log.append(error_line)
+
+        result_data = self._result(result_text)
+        if self.trace_level == TRACE_SUMMARY:
+            self.trace_log.append(format_summary(self.step_count, self.current_state,
+                                                 self.head, result_data['tape']))
+
+        # Log selalu list string biasa (siap JSON, seperti yang diharapkan main.js).
+        # Entri langkah disimpan ringkas selama run dan baru diformat di sini;
+        # bentuk lazy-nya tetap tersedia di self.trace_log.
+        result_data["log"] = self.trace_log.to_list()
+        if self.delta_trace is not None:
+            result_data["trace"] = self.delta_trace.to_dict()
+        return result_data
+
+    def run_iter(self):
+        """
+        Versi generator dari run() untuk streaming.
+        Yield ('step', baris_log) untuk setiap langkah segera setelah dieksekusi,
+        lalu ('result', dict_hasil) di akhir (sama seperti run(), tanpa 'log').
+        Jika trace_level 'delta': yield ('init', header DeltaTrace) sekali, lalu
+        ('delta', tuple) per langkah, bukan baris log teks; baris yang tidak punya
+        delta (HALT karena tidak ada transisi, pesan error) ada di result['log'].
+        Trace tidak disimpan, jadi memori tetap konstan berapa pun panjang
+        trace-nya. Selalu per langkah (tanpa macro-step).
+        """
+        pending = []
+        delta_trace = self.delta_trace
+        if delta_trace is not None:
+            self._record = None
+            yield 'init', delta_trace.header()
+            pending = delta_trace.steps
         else:
-            result_text = "DITOLAK"
+            self._record = pending.append
+        format_entry = self.trace_log.format_entry
+        halting = self.compiled.halting
+        deadline = perf_counter() + self.time_budget if self.time_budget is not None else None
+        timed_out = False
+
+        self._log_step("INITIALIZING TAPE")
+
+        while True:
+            for entry in pending:
+                if delta_trace is not None:
+                    yield 'delta', entry
+                else:
+                    yield 'step', format_entry(entry)
+            pending.clear()
+
+            if halting[self._state] or self.step_count >= self.max_steps:
+                break
+            if deadline is not None and perf_counter() > deadline:
+                timed_out = True
+                break
+            self.step()
+
+        result_text, error_line = self._verdict(timed_out)
+        if error_line:
+            self.trace_log.append(error_line) # Sama seperti run() (dipakai result_cache)
+        result_data = self._result(result_text)
+        if delta_trace is not None:
+            # Baris yang tidak punya delta: alasan HALT atau pesan error
+            result_data['log'] = [line for line in (self._halt_line(), error_line) if line]
+        elif error_line:
+            yield 'step', error_line
+        yield 'result', result_data
 
-        # Return struktur data yang diharapkan oleh main.js
+    def _verdict(self, timed_out):
+        """Return (teks hasil akhir, baris error untuk log atau None)."""
+        if self._state == self.compiled.accept_id:
+            return "DITERIMA", None
+        if timed_out:
+            return "TIMEOUT (Waktu habis)", f"\n[ERROR] Batas waktu ({self.time_budget} detik) terlampaui."
+        if self.step_count >= self.max_steps:
+            return "TIMEOUT (Loop?)", f"\n[ERROR] Batas langkah maksimum ({self.max_steps}) terlampaui."
+        return "DITOLAK", None
+
+    def _result(self, result_text):
+        """Struktur data hasil yang diharapkan oleh main.js (tanpa 'log')."""
         return {
             "result": result_text,
             "status": self.current_state,
-            "log": self.trace_log,
+            "steps": self.step_count,
             "tape": "".join(self.tape), # Kirim pita penuh sebagai string
             "head_position": self.head
-        }
\ No newline at end of file
+        }